@@ -26,6 +26,9 @@ class Settings(BaseSettings):
     # Session Configuration
     SESSION_TIMEOUT: int = int(os.getenv("SESSION_TIMEOUT", "3600"))  # 1 hour
     MAX_CONVERSATION_LENGTH: int = int(os.getenv("MAX_CONVERSATION_LENGTH", "20"))
+
+    # Redis Configuration (empty = in-process conversation storage)
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
     
     class Config:
         env_file = ".env"
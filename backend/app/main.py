@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from app.models.request_models import ChatRequest, ConversationRequest
 from app.models.response_models import ChatResponse, ConversationResponse, HealthResponse
 from app.services.llm_service import LLMService
@@ -8,6 +9,7 @@ from app.services.currency_service import CurrencyService
 from app.config.settings import settings
 import logging
 import asyncio
+import time
 from typing import Dict, Any
 from datetime import datetime
 
@@ -15,6 +17,10 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Response line templates, built once instead of per-request f-strings
+_CONV_TMPL = "{amount} {from_currency} = {converted_amount:.2f} {to_currency}"
+_RATE_TMPL = "1 {from_currency} = {exchange_rate:.4f} {to_currency}"
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Currency Converter Agent",
@@ -34,9 +40,21 @@ app.add_middleware(
 conversation_service = ConversationService()
 currency_service = CurrencyService()
 
-# Health check endpoint
+# The event loop only holds weak references to tasks, so fire-and-forget
+# tasks must be anchored here until they finish or they can be
+# garbage-collected mid-execution
+_background_tasks: set = set()
+
+def _spawn_background(coro) -> asyncio.Task:
+    """Create a task and keep a strong reference until it completes"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+# Lightweight health probe (the versioned endpoint below returns full detail)
 @app.get("/health", tags=["Health"])
-async def health_check():
+async def health_probe():
     return {"status": "healthy"}
 
 @app.on_event("startup")
@@ -47,6 +65,8 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    await currency_service.aclose()
+    await conversation_service.aclose()
     logger.info("Shutting down Currency Converter Agent API")
 
 @app.get("/api/v1/health", response_model=HealthResponse)
@@ -58,6 +78,23 @@ async def health_check():
         version="1.0.0"
     )
 
+async def _persist_exchange(session_id: str, user_message: str, assistant_message: str) -> None:
+    """
+    Persist both turns of an exchange in the background; failures only log so
+    they never become unhandled-task warnings or user-visible errors
+    """
+    try:
+        await conversation_service.add_message(session_id, {
+            "role": "user",
+            "content": user_message
+        })
+        await conversation_service.add_message(session_id, {
+            "role": "assistant",
+            "content": assistant_message
+        })
+    except Exception as e:
+        logger.error(f"Failed to persist conversation for {session_id}: {e}")
+
 @app.post("/api/v1/chat/completions", response_model=ChatResponse)
 async def chat_completion(request: ChatRequest):
     """
@@ -72,23 +109,13 @@ async def chat_completion(request: ChatRequest):
             conversions = currency_service.parse_conversion_query(request.message)
             results = await currency_service.batch_convert_currencies(conversions)
             
-            # Format conversions
-            conversion_lines = []
-            rate_lines = []
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            
-            for result in results:
-                if "error" in result:
-                    conversion_lines.append(f"❌ {result['error']}")
-                else:
-                    conversion_lines.append(
-                        f"{result['amount']} {result['from_currency']} = "
-                        f"{result['converted_amount']:.2f} {result['to_currency']}"
-                    )
-                    rate_lines.append(
-                        f"1 {result['from_currency']} = "
-                        f"{result['exchange_rate']:.4f} {result['to_currency']}"
-                    )
+            # Format conversions (time.strftime skips datetime object construction)
+            timestamp = time.strftime("%H:%M:%S")
+            conversion_lines = [
+                f"❌ {result['error']}" if "error" in result else _CONV_TMPL.format(**result)
+                for result in results
+            ]
+            rate_lines = [_RATE_TMPL.format(**result) for result in results if "error" not in result]
             
             # Build response without using backslashes in f-strings
             response_parts = [
@@ -111,28 +138,72 @@ async def chat_completion(request: ChatRequest):
             response=response_text,
             session_id=request.session_id
         )
-        
-        # Add messages to conversation
-        conversation_service.add_message(request.session_id, {
-            "role": "user",
-            "content": request.message
-        })
-        conversation_service.add_message(request.session_id, {
-            "role": "assistant",
-            "content": response_text
-        })
-        
+
+        # Persist off the response path; at-most-once is acceptable for history
+        _spawn_background(
+            _persist_exchange(request.session_id, request.message, response_text)
+        )
+
         return response
         
     except Exception as e:
         logger.error(f"Error processing chat request: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.post("/api/v1/chat/completions/stream")
+async def chat_completion_stream(request: ChatRequest):
+    """
+    Stream conversion results line by line as each rate resolves, so time to
+    first byte is one round trip regardless of how many conversions were
+    requested. The non-streaming endpoint above keeps the existing shape.
+    """
+    try:
+        conversions = currency_service.parse_conversion_query(request.message)
+    except ValueError as e:
+        error_text = f"❌ {str(e)}"
+
+        async def error_gen():
+            yield f"data: {error_text}\n\n"
+
+        return StreamingResponse(error_gen(), media_type="text/event-stream")
+
+    async def generate():
+        lines = [f"🕒 {time.strftime('%H:%M:%S')}"]
+        yield f"data: {lines[0]}\n\n"
+
+        # Created here, not before the response is consumed: a client that
+        # disconnects immediately never spawns the conversion work
+        tasks = [
+            asyncio.create_task(currency_service.convert_currency(amount, from_curr, to_curr))
+            for amount, from_curr, to_curr in conversions
+        ]
+
+        try:
+            for coro in asyncio.as_completed(tasks):
+                try:
+                    result = await coro
+                    line = _CONV_TMPL.format(**result)
+                except ValueError as e:
+                    line = f"❌ {str(e)}"
+                lines.append(line)
+                yield f"data: {line}\n\n"
+        finally:
+            # No-ops when the stream completed; cancels the leftovers when
+            # the client disconnected mid-stream
+            for task in tasks:
+                task.cancel()
+
+        # Persist the streamed exchange once it is complete; failures log
+        # inside _persist_exchange instead of breaking the stream teardown
+        await _persist_exchange(request.session_id, request.message, "\n".join(lines))
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
 @app.get("/api/v1/conversations/{session_id}", response_model=ConversationResponse)
 async def get_conversation(session_id: str):
     """Retrieve chat history for a session"""
     try:
-        conversation_history = ConversationService.get_conversation(session_id)
+        conversation_history = await conversation_service.get_conversation(session_id)
         return ConversationResponse(
             session_id=session_id,
             messages=conversation_history
@@ -145,7 +216,7 @@ async def get_conversation(session_id: str):
 async def clear_conversation(session_id: str):
     """Clear conversation history for a session"""
     try:
-        ConversationService.clear_conversation(session_id)
+        await conversation_service.clear_conversation(session_id)
         return {"message": f"Conversation {session_id} cleared successfully"}
     except Exception as e:
         logger.error(f"Error clearing conversation: {str(e)}")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from app.models.request_models import Message
@@ -10,11 +10,11 @@ class ChatResponse(BaseModel):
 class ConversationResponse(BaseModel):
     session_id: str = Field(..., description="Session ID")
     messages: List[Message] = Field(default=[], description="Conversation history")
-    total_messages: int = Field(default=0, description="Total number of messages")
-    
-    def __init__(self, **data):
-        super().__init__(**data)
-        self.total_messages = len(self.messages)
+
+    @computed_field(description="Total number of messages")
+    @property
+    def total_messages(self) -> int:
+        return len(self.messages)
 
 class CurrencyConversionResponse(BaseModel):
     amount: float = Field(..., description="Original amount")
@@ -1,24 +1,90 @@
-import time
+import asyncio
+from collections import OrderedDict, deque
 from typing import Dict, List, Optional
-from datetime import datetime
 import logging
+import orjson
 from app.config.settings import settings
 
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    Redis = None
+
 logger = logging.getLogger(__name__)
 
 class ConversationService:
+    """
+    Conversation storage with two backends: Redis (when REDIS_URL is set),
+    which survives restarts and is shared across uvicorn workers, or the
+    in-process LRU store as before.
+    """
+
     def __init__(self):
-        self.conversations = {}
+        # LRU-ordered sessions, each capped at MAX_CONVERSATION_LENGTH messages
+        self.conversations: "OrderedDict[str, deque]" = OrderedDict()
+        self._max_sessions = 10_000
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._redis: Optional["Redis"] = None
+        if settings.REDIS_URL:
+            if Redis is None:
+                logger.warning("REDIS_URL is set but the redis package is not installed")
+            else:
+                self._redis = Redis.from_url(settings.REDIS_URL)
+                logger.info("Using Redis conversation storage")
+
+    def _lock_for(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks.setdefault(session_id, asyncio.Lock())
+        return lock
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"conv:{session_id}"
+
+    async def get_conversation(self, session_id: str) -> List[dict]:
+        if self._redis is not None:
+            raw = await self._redis.lrange(self._key(session_id), 0, -1)
+            return [orjson.loads(item) for item in raw]
+
+        conversation = self.conversations.get(session_id)
+        if conversation is None:
+            return []
+        self.conversations.move_to_end(session_id)
+        return list(conversation)
+
+    async def add_message(self, session_id: str, message: dict):
+        if self._redis is not None:
+            key = self._key(session_id)
+            await self._redis.rpush(key, orjson.dumps(message))
+            await self._redis.ltrim(key, -settings.MAX_CONVERSATION_LENGTH, -1)
+            await self._redis.expire(key, settings.SESSION_TIMEOUT)
+            return
+
+        # Serialize writers per session so concurrent requests keep message order
+        async with self._lock_for(session_id):
+            conversation = self.conversations.get(session_id)
+            if conversation is None:
+                conversation = deque(maxlen=settings.MAX_CONVERSATION_LENGTH)
+                self.conversations[session_id] = conversation
+            conversation.append(message)
+            self.conversations.move_to_end(session_id)
+            if len(self.conversations) > self._max_sessions:
+                evicted, _ = self.conversations.popitem(last=False)
+                self._locks.pop(evicted, None)
+                logger.info(f"Evicted least recently used session: {evicted}")
 
-    def get_conversation(self, session_id: str) -> list:
-        if session_id not in self.conversations:
-            self.conversations[session_id] = []
-        return self.conversations[session_id]
+    async def clear_conversation(self, session_id: str):
+        if self._redis is not None:
+            await self._redis.delete(self._key(session_id))
+            return
 
-    def add_message(self, session_id: str, message: dict):
-        if session_id not in self.conversations:
-            self.conversations[session_id] = []
-        self.conversations[session_id].append(message)
+        self.conversations.pop(session_id, None)
+        self._locks.pop(session_id, None)
 
-    def clear_conversation(self, session_id: str):
-        self.conversations[session_id] = []
\ No newline at end of file
+    async def aclose(self) -> None:
+        """
+        Close the Redis connection pool (called on application shutdown)
+        """
+        if self._redis is not None:
+            await self._redis.aclose()
@@ -1,55 +1,109 @@
+import asyncio
 import httpx
+import numpy as np
 import re
-from typing import Dict, List, Tuple
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
 import logging
 from datetime import datetime
 
 from app.config.settings import settings
+from app.utils.validators import register_iso4217_codes
 
 logger = logging.getLogger(__name__)
 
+# Compiled once at import so the hot parse path skips re's cache lookups
+_CONVERSION_RE = re.compile(r"(?:convert\s+)?(\d+(?:\.\d+)?)\s+(\w{3})\s+(?:to|in|into)\s+(\w{3})", re.IGNORECASE)
+# Text allowed between conversions ("and" joiners, whitespace and
+# sentence punctuation such as "Convert 100 USD to EUR.")
+_GAP_RE = re.compile(r"(?:\s|\band\b|[.,!?])+", re.IGNORECASE)
+
+# Below this many items per base, plain Python beats NumPy setup overhead
+_VECTORIZE_MIN_ITEMS = 16
+
+# Shared across all instances; interned codes make membership checks pointer compares
+SUPPORTED_CURRENCIES = frozenset(sys.intern(code) for code in (
+    "USD", "EUR", "GBP", "JPY", "AUD", "CAD", "CHF", "CNY", "INR",
+    "NZD", "SGD", "HKD", "SEK", "KRW", "NOK", "MXN", "BRL", "PLN"
+))
+
 class CurrencyService:
     def __init__(self, base_url: str = settings.FRANKFURTER_BASE_URL):
         self.base_url = base_url
         self.timeout = 30.0
-        self.supported_currencies = set([
-            "USD", "EUR", "GBP", "JPY", "AUD", "CAD", "CHF", "CNY", "INR",
-            "NZD", "SGD", "HKD", "SEK", "KRW", "NOK", "MXN", "BRL", "PLN"
-        ])
+        self._client: Optional[httpx.AsyncClient] = None
+        # Cap in-flight Frankfurter requests to avoid 429s and socket exhaustion
+        self._sem = asyncio.Semaphore(8)
+        # Latest rates change at most daily, so short-TTL caching is safe
+        self._rate_cache: Dict[Tuple, Tuple[float, Dict]] = {}
+        self._rate_cache_ttl = 600.0  # seconds
+        # Historical rates are immutable, cache them indefinitely
+        self._historical_cache: Dict[Tuple[str, str, str], Dict] = {}
+        self.supported_currencies = SUPPORTED_CURRENCIES
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Lazily create a single shared HTTP client with connection pooling
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """
+        Close the shared HTTP client (called on application shutdown)
+        """
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
 
     async def convert_currency(self, amount: float, from_currency: str, to_currency: str) -> Dict:
         """Convert currency using Frankfurter API"""
+        supported = self.supported_currencies
+        if from_currency not in supported:
+            raise ValueError(f"Unsupported source currency: {from_currency}")
+        if to_currency not in supported:
+            raise ValueError(f"Unsupported target currency: {to_currency}")
+
+        logger.info("Converting %s %s to %s", amount, from_currency, to_currency)
+
         try:
-            if from_currency not in self.supported_currencies:
-                raise ValueError(f"Unsupported source currency: {from_currency}")
-            if to_currency not in self.supported_currencies:
-                raise ValueError(f"Unsupported target currency: {to_currency}")
+            cache_key = (from_currency, to_currency)
+            cached = self._rate_cache.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < self._rate_cache_ttl:
+                rate, rate_date = cached[1]["rate"], cached[1]["date"]
+            else:
+                url = f"{self.base_url}/latest"
+                params = {
+                    "amount": amount,
+                    "from": from_currency,
+                    "to": to_currency
+                }
 
-            logger.info(f"Converting {amount} {from_currency} to {to_currency}")
-            url = f"{self.base_url}/latest"
-            params = {
-                "amount": amount,
-                "from": from_currency,
-                "to": to_currency
-            }
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(url, params=params)
+                client = self._get_client()
+                async with self._sem:
+                    response = await client.get(url, params=params)
                 response.raise_for_status()
                 data = response.json()
-                
-                return {
-                    "amount": amount,
-                    "from_currency": from_currency,
-                    "to_currency": to_currency,
-                    "converted_amount": round(data["rates"][to_currency], 2),
-                    "exchange_rate": round(data["rates"][to_currency] / amount, 6),
-                    "date": data.get("date", datetime.now().strftime("%Y-%m-%d"))
-                }
-        except ValueError as e:
-            raise e
+
+                rate = data["rates"][to_currency] / amount
+                rate_date = data.get("date", datetime.now().strftime("%Y-%m-%d"))
+                self._rate_cache[cache_key] = (time.monotonic(), {"rate": rate, "date": rate_date})
+
+            return {
+                "amount": amount,
+                "from_currency": from_currency,
+                "to_currency": to_currency,
+                "converted_amount": round(amount * rate, 2),
+                "exchange_rate": round(rate, 6),
+                "date": rate_date
+            }
         except Exception as e:
-            logger.error(f"Currency conversion error: {str(e)}")
+            logger.error("Currency conversion error: %s", e)
             raise ValueError(f"Error converting {from_currency} to {to_currency}")
 
     async def get_supported_currencies(self) -> Dict[str, str]:
@@ -57,12 +111,16 @@ class CurrencyService:
         Get list of all supported currencies
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                url = f"{self.base_url}/currencies"
-                response = await client.get(url)
-                response.raise_for_status()
-                return response.json()
-                
+            client = self._get_client()
+            url = f"{self.base_url}/currencies"
+            response = await client.get(url)
+            response.raise_for_status()
+            currencies = response.json()
+            # Feed the published code list to the validators so currency
+            # validation collapses to a set membership probe
+            register_iso4217_codes(currencies.keys())
+            return currencies
+
         except Exception as e:
             logger.error(f"Error fetching supported currencies: {e}")
             raise Exception(f"Failed to fetch supported currencies: {str(e)}")
@@ -85,29 +143,36 @@ class CurrencyService:
                     raise ValueError("Invalid date format. Use YYYY-MM-DD")
                 raise
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                url = f"{self.base_url}/{date_str}"
-                params = {
-                    "from": from_currency,
-                    "to": to_currency
-                }
-                
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                if to_currency not in data["rates"]:
-                    raise ValueError(f"Exchange rate not available for {from_currency} to {to_currency} on {date_str}")
-                
-                exchange_rate = data["rates"][to_currency]
-                
-                return {
-                    "date": data["date"],
-                    "from_currency": from_currency,
-                    "to_currency": to_currency,
-                    "exchange_rate": exchange_rate
-                }
+            cache_key = (date_str, from_currency, to_currency)
+            cached = self._historical_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            client = self._get_client()
+            url = f"{self.base_url}/{date_str}"
+            params = {
+                "from": from_currency,
+                "to": to_currency
+            }
+
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+
+            data = response.json()
+
+            if to_currency not in data["rates"]:
+                raise ValueError(f"Exchange rate not available for {from_currency} to {to_currency} on {date_str}")
+
+            exchange_rate = data["rates"][to_currency]
+
+            result = {
+                "date": data["date"],
+                "from_currency": from_currency,
+                "to_currency": to_currency,
+                "exchange_rate": exchange_rate
+            }
+            self._historical_cache[cache_key] = result
+            return result
                 
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 400:
@@ -126,94 +191,189 @@ class CurrencyService:
         """
         try:
             base_currency = base_currency.upper()
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                url = f"{self.base_url}/latest"
-                params = {"from": base_currency}
-                
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                return response.json()
+
+            cache_key = (base_currency, "*")
+            cached = self._rate_cache.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < self._rate_cache_ttl:
+                return cached[1]
+
+            client = self._get_client()
+            url = f"{self.base_url}/latest"
+            params = {"from": base_currency}
+
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+
+            data = response.json()
+            self._rate_cache[cache_key] = (time.monotonic(), data)
+            return data
                 
         except Exception as e:
             logger.error(f"Error fetching latest rates: {e}")
             raise Exception(f"Failed to fetch latest rates: {str(e)}")
     
+    async def _fetch_rates_for_base(self, from_currency: str, to_currencies: List[str]) -> Dict:
+        """
+        Fetch latest rates for one base currency in a single Frankfurter call
+        """
+        cache_key = (from_currency, tuple(to_currencies))
+        cached = self._rate_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < self._rate_cache_ttl:
+            return cached[1]
+
+        client = self._get_client()
+        async with self._sem:
+            response = await client.get(
+                f"{self.base_url}/latest",
+                params={"from": from_currency, "to": ",".join(to_currencies)}
+            )
+        response.raise_for_status()
+        data = response.json()
+        self._rate_cache[cache_key] = (time.monotonic(), data)
+        return data
+
+    async def _convert_grouped(self, items: List[Tuple[float, str, str]]) -> List[Dict]:
+        """
+        Convert multiple (amount, from, to) items, grouping by source currency
+        so each base currency costs exactly one Frankfurter request
+        """
+        results: List[Optional[Dict]] = [None] * len(items)
+        groups: Dict[str, List[int]] = {}
+
+        for i, (amount, from_curr, to_curr) in enumerate(items):
+            if from_curr not in self.supported_currencies:
+                results[i] = {"error": f"Unsupported source currency: {from_curr}"}
+            elif to_curr not in self.supported_currencies:
+                results[i] = {"error": f"Unsupported target currency: {to_curr}"}
+            else:
+                groups.setdefault(from_curr, []).append(i)
+
+        async def convert_base(from_curr: str, indexes: List[int]) -> None:
+            to_currencies = sorted({items[i][2] for i in indexes})
+            try:
+                data = await self._fetch_rates_for_base(from_curr, to_currencies)
+                rates = data["rates"]
+                rate_date = data.get("date", datetime.now().strftime("%Y-%m-%d"))
+
+                if len(indexes) >= _VECTORIZE_MIN_ITEMS:
+                    count = len(indexes)
+                    amounts = np.fromiter(
+                        (items[i][0] for i in indexes), dtype=np.float64, count=count
+                    )
+                    rate_vec = np.fromiter(
+                        (rates[items[i][2]] for i in indexes), dtype=np.float64, count=count
+                    )
+                    converted = np.round(amounts * rate_vec, 2)
+                    for j, i in enumerate(indexes):
+                        amount, _, to_curr = items[i]
+                        results[i] = {
+                            "amount": amount,
+                            "from_currency": from_curr,
+                            "to_currency": to_curr,
+                            "converted_amount": float(converted[j]),
+                            "exchange_rate": round(float(rate_vec[j]), 6),
+                            "date": rate_date
+                        }
+                else:
+                    for i in indexes:
+                        amount, _, to_curr = items[i]
+                        rate = rates[to_curr]
+                        results[i] = {
+                            "amount": amount,
+                            "from_currency": from_curr,
+                            "to_currency": to_curr,
+                            "converted_amount": round(amount * rate, 2),
+                            "exchange_rate": round(rate, 6),
+                            "date": rate_date
+                        }
+            except Exception as e:
+                logger.error(f"Error converting from {from_curr}: {e}")
+                for i in indexes:
+                    results[i] = {"error": f"Error converting {from_curr} to {items[i][2]}"}
+
+        if groups:
+            await asyncio.gather(*(convert_base(f, idxs) for f, idxs in groups.items()))
+
+        return results
+
     async def convert_multiple_currencies(self, conversions: List[Dict]) -> List[Dict]:
         """
-        Convert multiple currencies concurrently
+        Convert multiple currencies with one Frankfurter call per base currency
         """
         try:
-            tasks = []
-            for conversion in conversions:
-                task = self.convert_currency(
-                    amount=conversion["amount"],
-                    from_currency=conversion["from_currency"],
-                    to_currency=conversion["to_currency"]
-                )
-                tasks.append(task)
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
+            items = [(c["amount"], c["from_currency"], c["to_currency"]) for c in conversions]
+            results = await self._convert_grouped(items)
+
             final_results = []
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    logger.error(f"Error in conversion {i}: {result}")
+            for conversion, result in zip(conversions, results):
+                if "error" in result:
                     final_results.append({
-                        "error": str(result),
-                        "conversion": conversions[i]
+                        "error": result["error"],
+                        "conversion": conversion
                     })
                 else:
                     final_results.append(result)
-            
+
             return final_results
-            
+
         except Exception as e:
             logger.error(f"Error in multiple currency conversion: {e}")
             raise Exception(f"Multiple currency conversion failed: {str(e)}")
     
-    def parse_conversion_query(self, query: str) -> List[Tuple[float, str, str]]:
-        """Parse currency conversion query with support for multiple conversions"""
+    def parse_conversion_query(self, query: str, strict: bool = True) -> List[Tuple[float, str, str]]:
+        """Parse currency conversion query with support for multiple conversions.
+
+        In strict mode (the user-facing conversion endpoints) anything in
+        the query besides conversions and joiners raises ValueError. With
+        strict=False conversions are extracted from surrounding natural
+        text ("What's 100 USD to EUR, please?") and an empty list means
+        none were found.
+        """
         conversions = []
-        
-        # Split query into separate conversion requests
-        conversion_requests = [req.strip() for req in query.split(" and ")]
-        
-        for request in conversion_requests:
-            # Pattern for single conversion: "100 USD to EUR" or "convert 100 USD to EUR"
-            pattern = r"(?:convert\s+)?(\d+(?:\.\d+)?)\s+(\w{3})\s+to\s+(\w{3})"
-            match = re.match(pattern, request.strip(), re.IGNORECASE)
-            
-            if match:
-                amount = float(match.group(1))
-                from_curr = match.group(2).upper()
-                to_curr = match.group(3).upper()
-                conversions.append((amount, from_curr, to_curr))
-            else:
+        pos = 0
+
+        # Single pass: walk the query once with finditer and check that the
+        # text between matches is only whitespace, joiners and punctuation
+        for match in _CONVERSION_RE.finditer(query):
+            gap = query[pos:match.start()]
+            if strict and gap and not _GAP_RE.fullmatch(gap):
                 raise ValueError(
-                    f"Invalid conversion format: '{request}'. "
+                    f"Invalid conversion format: '{gap.strip()}'. "
                     "Use format: '100 USD to EUR' or '100 USD to EUR and 50 GBP to JPY'"
                 )
-        
-        if not conversions:
-            raise ValueError("No valid currency conversions found in query")
-            
+
+            amount = float(match.group(1))
+            from_curr = sys.intern(match.group(2).upper())
+            to_curr = sys.intern(match.group(3).upper())
+            conversions.append((amount, from_curr, to_curr))
+            pos = match.end()
+
+        if strict:
+            tail = query[pos:]
+            if tail and not _GAP_RE.fullmatch(tail):
+                raise ValueError(
+                    f"Invalid conversion format: '{tail.strip()}'. "
+                    "Use format: '100 USD to EUR' or '100 USD to EUR and 50 GBP to JPY'"
+                )
+
+            if not conversions:
+                raise ValueError("No valid currency conversions found in query")
+
         return conversions
     
     async def batch_convert_currencies(self, conversions: List[Tuple[float, str, str]]) -> List[Dict]:
-        """Convert multiple currencies in batch"""
-        results = []
-        for amount, from_curr, to_curr in conversions:
-            try:
-                result = await self.convert_currency(amount, from_curr, to_curr)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error converting {amount} {from_curr} to {to_curr}: {str(e)}")
-                results.append({
-                    "error": str(e),
+        """Convert multiple currencies in batch, one request per base currency"""
+        results = await self._convert_grouped(conversions)
+
+        final_results = []
+        for (amount, from_curr, to_curr), result in zip(conversions, results):
+            if "error" in result:
+                final_results.append({
+                    "error": result["error"],
                     "amount": amount,
                     "from_currency": from_curr,
                     "to_currency": to_curr
                 })
-        return results
\ No newline at end of file
+            else:
+                final_results.append(result)
+        return final_results
\ No newline at end of file
@@ -1,14 +1,38 @@
 import httpx
-import json
-import re
 import logging
+import orjson
 from typing import Dict, List, Optional, Tuple, Any
 from app.config.settings import settings
 from app.services.currency_service import CurrencyService
-from app.utils.function_schemas import AVAILABLE_FUNCTIONS, SYSTEM_PROMPT
+from app.utils.function_schemas import (
+    AVAILABLE_FUNCTIONS,
+    SYSTEM_PROMPT,
+    SYSTEM_PROMPT_MESSAGE_JSON,
+)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
+# Token budget for the history slice sent upstream with each LLM call
+HISTORY_TOKEN_BUDGET = 2000
+
+_encoding = None
+
+def _get_encoding():
+    """Load the tokenizer lazily; False marks a failed load so we try once"""
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"Could not load tiktoken encoding: {e}")
+            _encoding = False
+    return _encoding or None
+
 class LLMService:
     def __init__(self):
         self.api_key = settings.OPENROUTER_API_KEY
@@ -17,9 +41,38 @@ class LLMService:
         self.max_tokens = settings.MAX_TOKENS
         self.temperature = settings.TEMPERATURE
         self.currency_service = CurrencyService()
-        
-        # Multi-conversion regex pattern (case-insensitive, global)
-        self.conversion_pattern = r'(\d+(?:\.\d+)?)\s*([a-zA-Z]{3})\s*(?:to|in)\s*([a-zA-Z]{3})'
+        # Constant request pieces, built once instead of per call
+        self._sys_msg = {"role": "system", "content": SYSTEM_PROMPT}
+        self._tools = [{"type": "function", "function": func} for func in AVAILABLE_FUNCTIONS]
+        # Static payload head serialized once: model, sampling params, tools
+        # and the system message never change between turns, so each request
+        # only encodes the variable message tail
+        self._payload_head = (
+            b'{"model":' + orjson.dumps(self.model)
+            + b',"max_tokens":' + orjson.dumps(self.max_tokens)
+            + b',"temperature":' + orjson.dumps(self.temperature)
+            + b',"tools":' + orjson.dumps(self._tools, default=dict)
+            + b',"messages":[' + SYSTEM_PROMPT_MESSAGE_JSON
+        )
+        # Persistent client: keep-alive + HTTP/2 avoids a TLS handshake per LLM call
+        self._http = httpx.AsyncClient(
+            timeout=30.0,
+            http2=True,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            limits=httpx.Limits(max_keepalive_connections=10)
+        )
+
+    async def aclose(self) -> None:
+        """
+        Close the persistent HTTP client (called on application shutdown)
+        """
+        if not self._http.is_closed:
+            await self._http.aclose()
+        await self.currency_service.aclose()
+
         
     async def process_query(self, query: str, conversation_history: List[Dict] = None) -> str:
         """
@@ -52,20 +105,17 @@ class LLMService:
     
     def _extract_conversions(self, query: str) -> List[Dict]:
         """
-        Extract all currency conversions from query using regex
+        Extract all currency conversions by delegating to the currency service
+        parser, so each query is scanned once instead of twice. Lenient mode:
+        conversions embedded in natural text still hit the direct Frankfurter
+        path instead of falling through to an LLM round trip.
         """
-        conversions = []
-        matches = re.findall(self.conversion_pattern, query, re.IGNORECASE)
-        
-        for match in matches:
-            amount, from_currency, to_currency = match
-            conversions.append({
-                "amount": float(amount),
-                "from_currency": from_currency.upper(),
-                "to_currency": to_currency.upper()
-            })
-        
-        return conversions
+        parsed = self.currency_service.parse_conversion_query(query, strict=False)
+
+        return [
+            {"amount": amount, "from_currency": from_currency, "to_currency": to_currency}
+            for amount, from_currency, to_currency in parsed
+        ]
     
     def _format_multiple_conversions_response(self, results: List[Dict]) -> str:
         """
@@ -94,49 +144,67 @@ class LLMService:
         
         return "\n".join(response_parts)
     
+    @staticmethod
+    def _count_tokens(text: str) -> int:
+        enc = _get_encoding()
+        if enc is not None:
+            return len(enc.encode(text))
+        return len(text) // 4 + 1  # rough estimate when tiktoken is unavailable
+
+    def _trim_history(self, conversation_history: List[Dict],
+                      budget: int = HISTORY_TOKEN_BUDGET) -> List[Dict]:
+        """
+        Keep the newest messages that fit within the token budget, so long
+        turns no longer inflate the upstream payload the way a raw last-10
+        slice did
+        """
+        kept: List[Dict] = []
+        used = 0
+        for message in reversed(conversation_history):
+            cost = self._count_tokens(message.get("content", ""))
+            if kept and used + cost > budget:
+                break
+            kept.append(message)
+            used += cost
+        kept.reverse()
+        return kept
+
     async def _process_with_llm(self, query: str, conversation_history: List[Dict] = None) -> str:
         """
         Process query using LLM with tool/function calling
         """
         try:
-            # Prepare messages
-            messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-            
+            # Only the variable message tail gets encoded per call; the
+            # static head (model, params, tools, system message) is spliced
+            # in as pre-serialized bytes
+            messages = []
+
             if conversation_history:
-                messages.extend(conversation_history[-10:])  # Last 10 messages for context
-            
+                messages.extend(self._trim_history(conversation_history))
+
             messages.append({"role": "user", "content": query})
-            
-            # Prepare request payload
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "max_tokens": self.max_tokens,
-                "temperature": self.temperature,
-                "tools": [{"type": "function", "function": func} for func in AVAILABLE_FUNCTIONS]
-            }
-            
-            # Make API request
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json=payload
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                message = data["choices"][0]["message"]
-                
-                # Check if LLM wants to call functions
-                if "tool_calls" in message and message["tool_calls"]:
-                    logger.info(f"LLM returned {len(message['tool_calls'])} tool calls")
-                    return await self._handle_tool_calls(message["tool_calls"])
-                else:
-                    return message.get("content", "I couldn't process your request.")
+
+            # orjson.dumps(messages) is b'[...]'; strip the opening bracket
+            # and join onto the head's open messages array
+            body = self._payload_head + b',' + orjson.dumps(messages)[1:] + b'}'
+
+            # Make API request over the persistent client; orjson beats the
+            # stdlib encoder httpx would use for json=payload
+            response = await self._http.post(
+                f"{self.base_url}/chat/completions",
+                content=body
+            )
+            response.raise_for_status()
+
+            data = orjson.loads(response.content)
+            message = data["choices"][0]["message"]
+
+            # Check if LLM wants to call functions
+            if "tool_calls" in message and message["tool_calls"]:
+                logger.info(f"LLM returned {len(message['tool_calls'])} tool calls")
+                return await self._handle_tool_calls(message["tool_calls"])
+            else:
+                return message.get("content", "I couldn't process your request.")
                 
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error in LLM request: {e}")
@@ -154,7 +222,7 @@ class LLMService:
         for tool_call in tool_calls:
             try:
                 function_name = tool_call["function"]["name"]
-                arguments = json.loads(tool_call["function"]["arguments"])
+                arguments = orjson.loads(tool_call["function"]["arguments"])
                 
                 if function_name == "convert_currency":
                     result = await self.currency_service.convert_currency(
@@ -2,7 +2,22 @@
 Function schemas for LLM tool/function calling
 """
 
-CURRENCY_CONVERSION_SCHEMA = {
+from types import MappingProxyType
+
+import orjson
+
+def _freeze(obj):
+    """
+    Recursively wrap dicts in MappingProxyType and lists in tuples so the
+    schemas are safely shareable and never need defensive deepcopies
+    """
+    if isinstance(obj, dict):
+        return MappingProxyType({key: _freeze(value) for key, value in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(value) for value in obj)
+    return obj
+
+CURRENCY_CONVERSION_SCHEMA = _freeze({
     "name": "convert_currency",
     "description": "Convert amount from one currency to another using real-time exchange rates",
     "parameters": {
@@ -25,9 +40,9 @@ CURRENCY_CONVERSION_SCHEMA = {
         },
         "required": ["amount", "from_currency", "to_currency"]
     }
-}
+})
 
-CURRENCY_LIST_SCHEMA = {
+CURRENCY_LIST_SCHEMA = _freeze({
     "name": "get_supported_currencies",
     "description": "Get list of all supported currencies",
     "parameters": {
@@ -35,9 +50,9 @@ CURRENCY_LIST_SCHEMA = {
         "properties": {},
         "required": []
     }
-}
+})
 
-HISTORICAL_RATE_SCHEMA = {
+HISTORICAL_RATE_SCHEMA = _freeze({
     "name": "get_historical_rate",
     "description": "Get historical exchange rate for a specific date",
     "parameters": {
@@ -61,14 +76,18 @@ HISTORICAL_RATE_SCHEMA = {
         },
         "required": ["date", "from_currency", "to_currency"]
     }
-}
+})
 
-# All available functions for the LLM
-AVAILABLE_FUNCTIONS = [
+# All available functions for the LLM (immutable, shareable across coroutines)
+AVAILABLE_FUNCTIONS = (
     CURRENCY_CONVERSION_SCHEMA,
     CURRENCY_LIST_SCHEMA,
     HISTORICAL_RATE_SCHEMA
-]
+)
+
+# Pre-serialized once at import for hot send paths; default=dict unwraps the
+# MappingProxyType layers for orjson
+AVAILABLE_FUNCTIONS_JSON = orjson.dumps(AVAILABLE_FUNCTIONS, default=dict)
 
 # System prompt for the currency converter agent
 SYSTEM_PROMPT = """You are a helpful currency conversion assistant. You can:
@@ -88,4 +107,7 @@ Format your responses in a clear, user-friendly manner with:
 - The exchange rate used
 - The date of the exchange rate
 
-For multiple conversions, present each conversion in a separate, clearly marked section."""
\ No newline at end of file
+For multiple conversions, present each conversion in a separate, clearly marked section."""
+
+# System message in chat format, serialized once for hot send paths
+SYSTEM_PROMPT_MESSAGE_JSON = orjson.dumps({"role": "system", "content": SYSTEM_PROMPT})
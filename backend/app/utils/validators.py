@@ -1,14 +1,125 @@
 import re
-from typing import Optional, Tuple, List
-from datetime import datetime, date
+import string
+from functools import lru_cache
+from typing import Annotated, Optional, Tuple, List, Union
+from datetime import date
 import logging
 
+from pydantic import Field, TypeAdapter
+from pydantic import ValidationError as PydanticValidationError
+
 logger = logging.getLogger(__name__)
 
+# Compiled once at import so hot validation paths skip re's cache.
+# The conversion pattern always runs on pre-lowercased text, so no IGNORECASE.
+# One alternation covers "100 usd to eur", "convert 100 usd to eur" and
+# "100 dollars to euros" in a single pass instead of three full scans.
+_CONVERSION_PATTERN = re.compile(
+    r'(?:(?:convert|change)\s+)?'
+    r'(\d+(?:\.\d+)?)\s*(dollars?|euros?|pounds?|yen|[a-z]{3})'
+    r'\s+(?:to|in|into)\s+(dollars?|euros?|pounds?|yen|[a-z]{3})'
+)
+
+_TOKEN_PATTERN = re.compile(r'[a-z]+')
+
+# All single tokens, so one tokenize + O(1) set lookups replaces a substring
+# walk per keyword
+_CURRENCY_KEYWORDS = frozenset({
+    'convert', 'converting', 'conversion', 'conversions',
+    'exchange', 'rate', 'rates', 'currency', 'currencies', 'money',
+    'dollar', 'dollars', 'euro', 'euros', 'pound', 'pounds', 'yen',
+    'usd', 'eur', 'gbp', 'jpy'
+})
+# Deletion table for session IDs: translate strips every allowed character,
+# so anything left over is invalid — a C loop instead of the regex engine
+_SESSION_ID_DELETE_TBL = str.maketrans('', '', string.ascii_letters + string.digits + '-_')
+
+# Plain literals: str.__contains__ is a C substring search, far cheaper than
+# running the regex engine for fixed strings
+_SUSPICIOUS_LITERALS = ('<script', 'javascript:', 'data:text/html', 'vbscript:')
+
+# Conversion-request shape compiled once into a pydantic-core (Rust) validator,
+# so the extraction hot loop skips the Python-level isinstance/len/isalpha chain
+_CONVERSION_REQUEST_ADAPTER = TypeAdapter(
+    Tuple[
+        Annotated[float, Field(gt=0, le=1e12)],
+        Annotated[str, Field(pattern=r'^[A-Z]{3}$')],
+        Annotated[str, Field(pattern=r'^[A-Z]{3}$')],
+    ]
+)
+
+# Populated from Frankfurter's /currencies listing at startup; while unset,
+# validation falls back to the structural length/alpha check
+_ISO4217_CODES: Optional[frozenset] = None
+
+def register_iso4217_codes(codes) -> None:
+    """
+    Freeze the supported ISO-4217 codes (e.g. Frankfurter /currencies keys)
+    so currency validation becomes a single set membership probe
+    """
+    global _ISO4217_CODES
+    _ISO4217_CODES = frozenset(code.upper() for code in codes)
+    # Stale entries may predate the code list; start fresh
+    _validate_currency_code_cached.cache_clear()
+
 class ValidationError(Exception):
     """Custom exception for validation errors"""
     pass
 
+class _Invalid:
+    """Sentinel wrapping a rejection reason so misses can live in the cache"""
+
+    __slots__ = ('reason',)
+
+    def __init__(self, reason: str):
+        self.reason = reason
+
+@lru_cache(maxsize=512)
+def _validate_currency_code_cached(currency_code: str) -> Union[str, _Invalid]:
+    """
+    Cached core of currency-code validation, keyed on the raw input.
+    Returns the normalized code or an _Invalid sentinel (never raises,
+    so rejections are memoized too).
+    """
+    normalized = currency_code.strip().upper()
+
+    # With the published code list available, one hash probe replaces the
+    # per-character classification below
+    if _ISO4217_CODES is not None:
+        if normalized not in _ISO4217_CODES:
+            return _Invalid(f"Unknown currency code: {normalized}")
+        return normalized
+
+    if len(normalized) != 3:
+        return _Invalid(f"Currency code must be 3 characters long: {normalized}")
+
+    if not normalized.isalpha():
+        return _Invalid(f"Currency code must contain only letters: {normalized}")
+
+    return normalized
+
+@lru_cache(maxsize=512)
+def _validate_date_string_cached(date_str: str) -> Union[str, _Invalid]:
+    """
+    Cached core of date validation; the future-date check is re-run by the
+    caller since "today" moves while the cache entry does not
+    """
+    # fromisoformat is the C fast path, but it also accepts compact forms
+    # like 20200101 — the length check keeps the dashed format mandatory
+    if len(date_str) != 10:
+        return _Invalid(f"Date must be in YYYY-MM-DD format: {date_str}")
+
+    try:
+        parsed_date = date.fromisoformat(date_str)
+    except ValueError:
+        return _Invalid(f"Invalid date: {date_str}")
+
+    # Frankfurter data starts from 1999-01-04
+    if parsed_date < date(1999, 1, 4):
+        return _Invalid(f"Date cannot be earlier than 1999-01-04: {date_str}")
+
+    return date_str
+
 class CurrencyValidator:
     # Common currency codes for validation
     COMMON_CURRENCIES = {
@@ -25,19 +136,14 @@ class CurrencyValidator:
         """
         if not currency_code:
             raise ValidationError("Currency code cannot be empty")
-        
-        currency_code = currency_code.strip().upper()
-        
-        if len(currency_code) != 3:
-            raise ValidationError(f"Currency code must be 3 characters long: {currency_code}")
-        
-        if not currency_code.isalpha():
-            raise ValidationError(f"Currency code must contain only letters: {currency_code}")
-        
+
         # Note: We don't validate against COMMON_CURRENCIES here as Frankfurter supports more
         # currencies than our common list, and we want to let the API validate supported currencies
-        
-        return currency_code
+
+        result = _validate_currency_code_cached(currency_code)
+        if isinstance(result, _Invalid):
+            raise ValidationError(result.reason)
+        return result
     
     @staticmethod
     def validate_amount(amount: float) -> float:
@@ -61,13 +167,19 @@ class CurrencyValidator:
     @staticmethod
     def validate_conversion_request(amount: float, from_currency: str, to_currency: str) -> Tuple[float, str, str]:
         """
-        Validate complete conversion request
+        Validate complete conversion request via the compiled adapter
         """
-        validated_amount = CurrencyValidator.validate_amount(amount)
-        validated_from = CurrencyValidator.validate_currency_code(from_currency)
-        validated_to = CurrencyValidator.validate_currency_code(to_currency)
-        
-        return validated_amount, validated_from, validated_to
+        if isinstance(from_currency, str):
+            from_currency = from_currency.strip().upper()
+        if isinstance(to_currency, str):
+            to_currency = to_currency.strip().upper()
+
+        try:
+            return _CONVERSION_REQUEST_ADAPTER.validate_python(
+                (amount, from_currency, to_currency)
+            )
+        except PydanticValidationError as e:
+            raise ValidationError(f"Invalid conversion request: {e.errors()[0]['msg']}")
 
 class DateValidator:
     @staticmethod
@@ -77,29 +189,16 @@ class DateValidator:
         """
         if not date_str:
             raise ValidationError("Date cannot be empty")
-        
-        date_pattern = r'^\d{4}-\d{2}-\d{2}$'
-        if not re.match(date_pattern, date_str):
-            raise ValidationError(f"Date must be in YYYY-MM-DD format: {date_str}")
-        
-        try:
-            parsed_date = datetime.strptime(date_str, "%Y-%m-%d")
-            
-            # Check if date is not in the future
-            if parsed_date.date() > date.today():
-                raise ValidationError(f"Date cannot be in the future: {date_str}")
-            
-            # Check if date is not too old (Frankfurter data starts from 1999-01-04)
-            min_date = date(1999, 1, 4)
-            if parsed_date.date() < min_date:
-                raise ValidationError(f"Date cannot be earlier than 1999-01-04: {date_str}")
-            
-        except ValueError as e:
-            if "time data" in str(e):
-                raise ValidationError(f"Invalid date: {date_str}")
-            raise ValidationError(f"Date validation error: {str(e)}")
-        
-        return date_str
+
+        result = _validate_date_string_cached(date_str)
+        if isinstance(result, _Invalid):
+            raise ValidationError(result.reason)
+
+        # The future-date check stays outside the cache: "today" changes
+        if date.fromisoformat(result) > date.today():
+            raise ValidationError(f"Date cannot be in the future: {date_str}")
+
+        return result
 
 class QueryValidator:
     @staticmethod
@@ -115,8 +214,9 @@ class QueryValidator:
         if len(session_id) < 10 or len(session_id) > 100:
             raise ValidationError(f"Session ID length must be between 10 and 100 characters: {len(session_id)}")
         
-        # Allow alphanumeric and hyphens for UUID format
-        if not re.match(r'^[a-zA-Z0-9\-_]+$', session_id):
+        # Allow alphanumeric and hyphens for UUID format; non-ASCII input is
+        # rejected up front since the deletion table only covers ASCII
+        if not session_id.isascii() or session_id.translate(_SESSION_ID_DELETE_TBL):
             raise ValidationError(f"Session ID contains invalid characters: {session_id}")
         
         return session_id
@@ -138,17 +238,9 @@ class QueryValidator:
             raise ValidationError(f"Message is too long (max 1000 characters): {len(message)}")
         
         # Check for potentially malicious content
-        suspicious_patterns = [
-            r'<script',
-            r'javascript:',
-            r'data:text/html',
-            r'vbscript:',
-        ]
-        
         message_lower = message.lower()
-        for pattern in suspicious_patterns:
-            if re.search(pattern, message_lower):
-                raise ValidationError("Message contains potentially malicious content")
+        if any(literal in message_lower for literal in _SUSPICIOUS_LITERALS):
+            raise ValidationError("Message contains potentially malicious content")
         
         return message
 
@@ -157,16 +249,11 @@ class ConversionExtractor:
     Utility class for extracting currency conversion requests from text
     """
     
-    # Enhanced regex patterns for different conversion formats
-    CONVERSION_PATTERNS = [
-        # "100 USD to EUR", "50.5 GBP in JPY"
-        r'(\d+(?:\.\d+)?)\s*([a-zA-Z]{3})\s+(?:to|in|into)\s+([a-zA-Z]{3})',
-        # "convert 100 USD to EUR", "change 50 GBP to JPY"
-        r'(?:convert|change)\s+(\d+(?:\.\d+)?)\s*([a-zA-Z]{3})\s+(?:to|in|into)\s+([a-zA-Z]{3})',
-        # "100 dollars to euros" (common currency names)
-        r'(\d+(?:\.\d+)?)\s*(dollars?|euros?|pounds?|yen)\s+(?:to|in|into)\s+(dollars?|euros?|pounds?|yen)',
-    ]
-    
+    # Merged alternation pattern covering every conversion format (module level)
+    CONVERSION_PATTERN = _CONVERSION_PATTERN
+
+    # Keys are lowercase: CONVERSION_PATTERN only ever runs on lowercased
+    # text, so match groups can index this map without calling .lower()
     CURRENCY_NAME_MAP = {
         'dollar': 'USD', 'dollars': 'USD',
         'euro': 'EUR', 'euros': 'EUR',
@@ -180,50 +267,44 @@ class ConversionExtractor:
         Extract all currency conversions from text
         Returns list of (amount, from_currency, to_currency) tuples
         """
+        # Cheap gate: most chit-chat carries no currency context, so reject it
+        # before paying for the regex scan and validation. A digit check keeps
+        # bare-code queries like "100 chf to sek" on the slow path.
+        if not cls.has_currency_context(text) and not any(c.isdigit() for c in text):
+            return []
+
+        seen = set()
         conversions = []
         text_lower = text.lower()
-        
-        for pattern in cls.CONVERSION_PATTERNS:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            
-            for match in matches:
-                try:
-                    amount_str, from_curr, to_curr = match
-                    amount = float(amount_str)
-                    
-                    # Convert currency names to codes if needed
-                    from_currency = cls.CURRENCY_NAME_MAP.get(from_curr.lower(), from_curr.upper())
-                    to_currency = cls.CURRENCY_NAME_MAP.get(to_curr.lower(), to_curr.upper())
-                    
-                    # Validate the extracted conversion
-                    validated = CurrencyValidator.validate_conversion_request(
-                        amount, from_currency, to_currency
-                    )
+
+        for match in cls.CONVERSION_PATTERN.finditer(text_lower):
+            try:
+                amount_str, from_curr, to_curr = match.groups()
+                amount = float(amount_str)
+
+                # Convert currency names to codes if needed
+                from_currency = cls.CURRENCY_NAME_MAP.get(from_curr, from_curr.upper())
+                to_currency = cls.CURRENCY_NAME_MAP.get(to_curr, to_curr.upper())
+
+                # Validate the extracted conversion; dedup inline while
+                # preserving first-seen order
+                validated = CurrencyValidator.validate_conversion_request(
+                    amount, from_currency, to_currency
+                )
+                if validated not in seen:
+                    seen.add(validated)
                     conversions.append(validated)
-                    
-                except (ValueError, ValidationError) as e:
-                    logger.warning(f"Skipping invalid conversion in text: {match} - {e}")
-                    continue
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_conversions = []
-        for conv in conversions:
-            if conv not in seen:
-                seen.add(conv)
-                unique_conversions.append(conv)
-        
-        return unique_conversions
+
+            except (ValueError, ValidationError) as e:
+                logger.warning(f"Skipping invalid conversion in text: {match.group(0)} - {e}")
+                continue
+
+        return conversions
     
     @classmethod
     def has_currency_context(cls, text: str) -> bool:
         """
         Check if text contains currency-related context
         """
-        currency_keywords = [
-            'convert', 'conversion', 'exchange', 'rate', 'currency', 'money',
-            'dollar', 'euro', 'pound', 'yen', 'usd', 'eur', 'gbp', 'jpy'
-        ]
-        
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in currency_keywords)
\ No newline at end of file
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        return not _CURRENCY_KEYWORDS.isdisjoint(tokens)
\ No newline at end of file
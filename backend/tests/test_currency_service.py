@@ -1,7 +1,7 @@
 # backend/tests/test_currency_service.py
 import pytest
 import asyncio
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, patch, AsyncMock
 from app.services.currency_service import CurrencyService
 
 @pytest.fixture
@@ -18,8 +18,8 @@ async def test_convert_currency_success(currency_service):
             "date": "2024-01-15"
         }
         mock_response.raise_for_status.return_value = None
-        mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
-        
+        mock_client.return_value.get = AsyncMock(return_value=mock_response)
+
         result = await currency_service.convert_currency(100, "USD", "EUR")
         
         assert result["amount"] == 100
@@ -44,20 +44,17 @@ from app.services.llm_service import LLMService
 def llm_service():
     return LLMService()
 
-def test_extract_conversions(llm_service):
+@pytest.mark.parametrize("query,expected", [
+    ("Convert 100 USD to EUR", [{"amount": 100.0, "from_currency": "USD", "to_currency": "EUR"}]),
+    ("100 USD to EUR and 200 GBP to JPY", [
+        {"amount": 100.0, "from_currency": "USD", "to_currency": "EUR"},
+        {"amount": 200.0, "from_currency": "GBP", "to_currency": "JPY"}
+    ]),
+    ("What is the weather?", [])
+])
+def test_extract_conversions(llm_service, query, expected):
     """Test regex extraction of currency conversions"""
-    test_cases = [
-        ("Convert 100 USD to EUR", [{"amount": 100.0, "from_currency": "USD", "to_currency": "EUR"}]),
-        ("100 USD to EUR and 200 GBP to JPY", [
-            {"amount": 100.0, "from_currency": "USD", "to_currency": "EUR"},
-            {"amount": 200.0, "from_currency": "GBP", "to_currency": "JPY"}
-        ]),
-        ("What is the weather?", [])
-    ]
-    
-    for query, expected in test_cases:
-        result = llm_service._extract_conversions(query)
-        assert result == expected
+    assert llm_service._extract_conversions(query) == expected
 
 @pytest.mark.asyncio
 async def test_process_query_with_direct_conversion(llm_service):
@@ -1,35 +1,59 @@
 import httpx
 import asyncio
+import orjson
 from typing import Dict, Optional, List
 import logging
-import json
-from datetime import datetime
+import time
 
 logger = logging.getLogger(__name__)
 
 class APIClient:
-    def __init__(self, base_url: str = "http://localhost:8003"):
+    def __init__(self, base_url: str = "http://localhost:8003", health_ttl: float = 1.0):
         self.base_url = base_url.rstrip('/')
         self.timeout = 30.0
+        self.health_ttl = health_ttl
         self._connection_status = False
-        
+        self._client: Optional[httpx.AsyncClient] = None
+        # Coalesces UI polling: (monotonic timestamp, last healthy response)
+        self._last_health: Optional[tuple] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Lazily create one shared client so every call reuses pooled
+        keep-alive connections instead of paying TCP/TLS setup per request
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20)
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """
+        Close the shared client (for graceful shutdown)
+        """
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
     async def chat_completion(self, request_data: Dict) -> Optional[Dict]:
         """
         Send chat completion request to FastAPI backend
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/v1/chat/completions",
-                    json=request_data,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                
-                self._connection_status = True
-                result = response.json()
-                logger.info(f"Chat completion successful for session: {request_data.get('session_id')}")
-                return result
+            client = self._get_client()
+            response = await client.post(
+                f"{self.base_url}/api/v1/chat/completions",
+                content=orjson.dumps(request_data),
+                headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
+
+            self._connection_status = True
+            result = orjson.loads(response.content)
+            logger.info(f"Chat completion successful for session: {request_data.get('session_id')}")
+            return result
                 
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error in chat completion: {e.response.status_code} - {e.response.text}")
@@ -67,16 +91,16 @@ class APIClient:
         Get conversation history for a session
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/api/v1/conversations/{session_id}"
-                )
-                response.raise_for_status()
-                
-                self._connection_status = True
-                result = response.json()
-                logger.info(f"Retrieved conversation for session: {session_id}")
-                return result
+            client = self._get_client()
+            response = await client.get(
+                f"{self.base_url}/api/v1/conversations/{session_id}"
+            )
+            response.raise_for_status()
+
+            self._connection_status = True
+            result = orjson.loads(response.content)
+            logger.info(f"Retrieved conversation for session: {session_id}")
+            return result
                 
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error retrieving conversation: {e}")
@@ -93,15 +117,15 @@ class APIClient:
         Clear conversation history for a session
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/v1/conversations/{session_id}/clear"
-                )
-                response.raise_for_status()
-                
-                self._connection_status = True
-                logger.info(f"Cleared conversation for session: {session_id}")
-                return True
+            client = self._get_client()
+            response = await client.post(
+                f"{self.base_url}/api/v1/conversations/{session_id}/clear"
+            )
+            response.raise_for_status()
+
+            self._connection_status = True
+            logger.info(f"Cleared conversation for session: {session_id}")
+            return True
                 
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error clearing conversation: {e}")
@@ -117,19 +141,27 @@ class APIClient:
         """
         Check API health status
         """
+        # Serve hot polling loops from the short-TTL cache so N probes per
+        # second cost one network round trip
+        if self._last_health and time.monotonic() - self._last_health[0] < self.health_ttl:
+            return self._last_health[1]
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/api/v1/health")
-                response.raise_for_status()
-                
-                self._connection_status = True
-                result = response.json()
-                logger.debug("Health check successful")
-                return result
-                
+            client = self._get_client()
+            response = await client.get(f"{self.base_url}/api/v1/health", timeout=10.0)
+            response.raise_for_status()
+
+            self._connection_status = True
+            result = orjson.loads(response.content)
+            self._last_health = (time.monotonic(), result)
+            logger.debug("Health check successful")
+            return result
+
         except Exception as e:
             logger.warning(f"Health check failed: {e}")
             self._connection_status = False
+            # Don't suppress retries while the backend is down
+            self._last_health = None
             return None
     
     def is_connected(self) -> bool:
@@ -143,11 +175,11 @@ class APIClient:
         Test connection to API and return detailed status
         """
         try:
-            start_time = datetime.now()
+            # Monotonic counter: immune to NTP steps and far cheaper than
+            # wall-clock datetime construction
+            start_ns = time.perf_counter_ns()
             health_result = await self.health_check()
-            end_time = datetime.now()
-            
-            response_time = (end_time - start_time).total_seconds() * 1000  # ms
+            response_time = (time.perf_counter_ns() - start_ns) / 1e6  # ms
             
             if health_result:
                 return {
@@ -187,67 +219,85 @@ class APIClient:
         Get session statistics (if endpoint exists)
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/api/v1/conversations/{session_id}/stats"
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    return None
+            client = self._get_client()
+            response = await client.get(
+                f"{self.base_url}/api/v1/conversations/{session_id}/stats"
+            )
+
+            if response.status_code == 200:
+                return orjson.loads(response.content)
+            else:
+                return None
                     
         except:
             # Stats endpoint might not exist, return None
             return None
     
+    def _invalidate_client(self) -> None:
+        """
+        Drop the cached client so the next call rebuilds it with new settings
+        """
+        client, self._client = self._client, None
+        self._last_health = None
+        if client is not None and not client.is_closed:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # no loop running; the old client is released to GC
+            loop.create_task(client.aclose())
+
     def set_base_url(self, base_url: str) -> None:
         """
         Update base URL for API calls
         """
         self.base_url = base_url.rstrip('/')
         self._connection_status = False  # Reset connection status
+        self._invalidate_client()
         logger.info(f"Updated API base URL to: {self.base_url}")
-    
+
     def set_timeout(self, timeout: float) -> None:
         """
         Update request timeout
         """
         self.timeout = timeout
+        self._invalidate_client()
         logger.info(f"Updated API timeout to: {timeout}s")
     
-    async def batch_requests(self, requests: List[Dict]) -> List[Dict]:
+    async def _guarded_request(self, sem: asyncio.Semaphore, request: Dict, index: int) -> Optional[Dict]:
         """
-        Send multiple requests concurrently (if needed)
+        Dispatch one batch entry under the concurrency semaphore, tagging
+        failures instead of propagating them so one bad request cannot
+        cancel its siblings
         """
         try:
-            tasks = []
-            for request in requests:
+            async with sem:
                 if request.get("type") == "chat":
-                    task = self.chat_completion(request.get("data"))
+                    return await self.chat_completion(request.get("data"))
                 elif request.get("type") == "conversation":
-                    task = self.get_conversation(request.get("session_id"))
-                else:
-                    continue
-                tasks.append(task)
-            
-            if not tasks:
-                return []
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            processed_results = []
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    processed_results.append({
-                        "error": str(result),
-                        "request_index": i
-                    })
-                else:
-                    processed_results.append(result)
-            
-            return processed_results
-            
+                    return await self.get_conversation(request.get("session_id"))
+                return None
+        except Exception as e:
+            return {"error": str(e), "request_index": index}
+
+    async def batch_requests(self, requests: List[Dict], max_concurrency: int = 10) -> List[Dict]:
+        """
+        Send multiple requests concurrently with bounded parallelism so large
+        batches stay within the shared client's connection pool
+        """
+        try:
+            sem = asyncio.Semaphore(max_concurrency)
+
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(self._guarded_request(sem, request, i))
+                    for i, request in enumerate(requests)
+                ]
+
+            # Single comprehension over task results; unknown request types
+            # yield None and are filtered out. Error entries carry
+            # request_index positions from the *input* list.
+            return [result for task in tasks if (result := task.result()) is not None]
+
         except Exception as e:
             logger.error(f"Error in batch requests: {e}")
             return [{"error": str(e)} for _ in requests]
\ No newline at end of file
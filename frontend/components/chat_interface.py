@@ -1,26 +1,170 @@
 import streamlit as st
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Optional
-import re
 import logging
 
+try:
+    # Linear-time DFA engine when available; our patterns use no
+    # backreferences, so they compile unchanged
+    import re2 as re
+except ImportError:
+    import re
+
 logger = logging.getLogger(__name__)
 
+# Compiled once at import; conversion sections are parsed for every rendered
+# message, so skip re's per-call cache probe
+_AMOUNT_RE = re.compile(r'(\d+(?:\.\d+)?)\s+([A-Z]{3})\s+=\s+\*\*(\d+(?:\.\d+)?)\s+([A-Z]{3})\*\*')
+_RATE_RE = re.compile(r'1\s+([A-Z]{3})\s+=\s+(\d+(?:\.\d+)?)\s+([A-Z]{3})')
+_DATE_RE = re.compile(r'Rate Date:\s*(\d{4}-\d{2}-\d{2})')
+
+# Fused pattern capturing amount, rate and date in one linear scan of the
+# section; the per-field patterns above stay as the fallback when a section
+# lacks the rate or date lines
+_SECTION_RE = re.compile(
+    r'(?P<amount>\d+(?:\.\d+)?)\s+(?P<from>[A-Z]{3})\s+=\s+'
+    r'\*\*(?P<converted>\d+(?:\.\d+)?)\s+(?P<to>[A-Z]{3})\*\*'
+    r'.*?1\s+[A-Z]{3}\s+=\s+(?P<rate>\d+(?:\.\d+)?)\s+[A-Z]{3}'
+    r'.*?Rate Date:\s*(?P<date>\d{4}-\d{2}-\d{2})',
+    re.DOTALL
+)
+
+# Plain substrings for the conversion-response check; the old list carried a
+# literal "[A-Z]{3}" that could never match via `in`, replaced by a real
+# currency-token regex
+_CONV_INDICATORS = ("💱", "📊", "💰", "Exchange Rate", "Conversion", "Rate Date")
+_CCY_RE = re.compile(r'[A-Z]{3}')
+
+try:
+    # One automaton pass over the content instead of one substring walk per
+    # indicator; optional — the plain loop below covers the missing case
+    import ahocorasick
+
+    _INDICATOR_AUTOMATON = ahocorasick.Automaton()
+    for _indicator in _CONV_INDICATORS:
+        _INDICATOR_AUTOMATON.add_word(_indicator, _indicator)
+    _INDICATOR_AUTOMATON.make_automaton()
+except ImportError:
+    _INDICATOR_AUTOMATON = None
+
+def _has_conversion_indicator(content: str) -> bool:
+    if _INDICATOR_AUTOMATON is not None:
+        return next(_INDICATOR_AUTOMATON.iter(content), None) is not None
+    return any(tok in content for tok in _CONV_INDICATORS)
+
+# Streamlit reruns the whole script per interaction, re-rendering every
+# historical message; memoizing the pure parsers makes reruns skip all
+# regex work for already-seen content
+@lru_cache(maxsize=512)
+def _is_conversion_response_cached(content: str) -> bool:
+    return _has_conversion_indicator(content) or bool(_CCY_RE.search(content))
+
+def _is_number(token: str) -> bool:
+    return token.replace('.', '', 1).isdigit()
+
+def _is_currency_code(token: str) -> bool:
+    return len(token) == 3 and token.isalpha() and token.isupper()
+
+def _parse_section_fast(section: str) -> Optional[tuple]:
+    """
+    Marker-anchored parse of the backend's fixed conversion template using
+    C-level string ops; returns None so callers fall back to the regexes
+    whenever the markers or tokens don't line up exactly
+    """
+    left, sep, rest = section.partition(' = **')
+    if not sep:
+        return None
+    converted_blob, sep, tail = rest.partition('**')
+    if not sep:
+        return None
+
+    left_parts = left.rsplit(' ', 2)
+    if len(left_parts) < 2:
+        return None
+    amount_str, from_currency = left_parts[-2], left_parts[-1]
+
+    conv_parts = converted_blob.split(' ')
+    if len(conv_parts) != 2:
+        return None
+    converted_str, to_currency = conv_parts
+
+    if not (_is_number(amount_str) and _is_number(converted_str)
+            and _is_currency_code(from_currency) and _is_currency_code(to_currency)):
+        return None
+
+    rate = 'N/A'
+    _, sep, rate_tail = tail.partition(' = ')
+    if sep:
+        candidate = rate_tail.split(' ', 1)[0]
+        if _is_number(candidate):
+            rate = candidate
+
+    rate_date = 'N/A'
+    _, sep, date_tail = tail.partition('Rate Date: ')
+    if sep:
+        candidate = date_tail[:10]
+        if len(candidate) == 10 and candidate[4] == '-' and candidate[7] == '-':
+            rate_date = candidate
+
+    return (amount_str, from_currency, converted_str, to_currency, rate, rate_date)
+
+@lru_cache(maxsize=512)
+def _parse_conversion_section_cached(section: str) -> Optional[tuple]:
+    """
+    Parse one conversion section into an immutable field tuple
+    (amount, from, converted, to, rate, date), or None on no match
+    """
+    # The response template is produced by our own backend, so the
+    # string-method parser handles the common case without the regex engine
+    fast = _parse_section_fast(section)
+    if fast is not None:
+        return fast
+
+    fused = _SECTION_RE.search(section)
+    if fused:
+        return (
+            fused.group('amount'), fused.group('from'),
+            fused.group('converted'), fused.group('to'),
+            fused.group('rate'), fused.group('date')
+        )
+
+    amount_match = _AMOUNT_RE.search(section)
+    if not amount_match:
+        return None
+    rate_match = _RATE_RE.search(section)
+    date_match = _DATE_RE.search(section)
+    return (
+        amount_match.group(1), amount_match.group(2),
+        amount_match.group(3), amount_match.group(4),
+        rate_match.group(2) if rate_match else 'N/A',
+        date_match.group(1) if date_match else 'N/A'
+    )
+
 class ChatInterface:
-    def __init__(self):
-        self.message_limit = 50  # Limit displayed messages for performance
-        
+    def __init__(self, message_limit: int = 20):
+        # Rendering window: reruns only pay for the newest messages unless
+        # the user opts into the full history
+        self.message_limit = message_limit
+
     def display_messages(self, messages: List[Dict]) -> None:
         """
-        Display chat messages in the Streamlit interface
+        Display chat messages in the Streamlit interface, rendering only the
+        newest window unless older history is explicitly requested
         """
         try:
-            # Limit messages for performance
-            display_messages = messages[-self.message_limit:] if len(messages) > self.message_limit else messages
-            
-            for message in display_messages:
+            older = messages[:-self.message_limit] if len(messages) > self.message_limit else []
+
+            # A toggle genuinely skips the older loop until switched on;
+            # an expander's body would still execute on every rerun and
+            # only be collapsed client-side
+            if older and st.toggle(f"Show older messages ({len(older)})", key="show_older_messages"):
+                for message in older:
+                    self._render_message(message)
+
+            for message in messages[len(older):]:
                 self._render_message(message)
-                
+
         except Exception as e:
             logger.error(f"Error displaying messages: {e}")
             st.error("Error displaying conversation history")
@@ -32,33 +176,70 @@ class ChatInterface:
         try:
             role = message.get("role", "unknown")
             content = message.get("content", "")
-            timestamp = message.get("timestamp")
-            
+
             with st.chat_message(role):
                 if role == "assistant":
-                    self._render_assistant_message(content)
+                    self._render_assistant_message(content, message.get("parsed"))
                 else:
                     self._render_user_message(content)
-                
-                # Show timestamp if available
-                if timestamp:
-                    self._render_timestamp(timestamp)
+
+                # Prefer the display string precomputed at append time;
+                # fall back to parsing for messages that only carry the
+                # ISO timestamp
+                display_time = message.get("display_time")
+                if display_time:
+                    st.caption(f"🕒 {display_time}")
+                elif message.get("timestamp"):
+                    self._render_timestamp(message["timestamp"])
                     
         except Exception as e:
             logger.error(f"Error rendering message: {e}")
             st.error("Error rendering message")
     
-    def _render_assistant_message(self, content: str) -> None:
+    def parse_response(self, content: str) -> Optional[List]:
         """
-        Render assistant message with special formatting for currency conversions
+        Build the render model for an assistant response once, at append
+        time: a list of (conversion_data, raw_section) pairs, or None when
+        the response should render as plain markdown
         """
         try:
+            if not self._is_conversion_response(content):
+                return None
+
+            sections = content.split("**Conversion")
+            if len(sections) <= 1:
+                return None
+
+            return [
+                (self._parse_conversion_section(f"Conversion {section}"), f"Conversion {section}")
+                for section in sections[1:]
+            ]
+
+        except Exception as e:
+            logger.error(f"Error parsing assistant response: {e}")
+            return None
+
+    def _render_assistant_message(self, content: str, parsed: Optional[List] = None) -> None:
+        """
+        Render assistant message with special formatting for currency
+        conversions; a precomputed render model skips all re-parsing
+        """
+        try:
+            if parsed is not None:
+                for i, (conversion_data, raw_section) in enumerate(parsed, 1):
+                    if conversion_data:
+                        self._render_conversion_card(conversion_data, i)
+                    else:
+                        st.markdown(f"**Conversion {i}:**")
+                        st.markdown(raw_section)
+                return
+
             # Check if content contains currency conversion results
             if self._is_conversion_response(content):
                 self._render_conversion_response(content)
             else:
                 st.markdown(content)
-                
+
         except Exception as e:
             logger.error(f"Error rendering assistant message: {e}")
             st.write(content)  # Fallback to simple write
@@ -96,54 +277,53 @@ class ChatInterface:
         try:
             # Parse conversion details
             conversion_data = self._parse_conversion_section(section)
-            
+
             if conversion_data:
-                with st.container():
-                    st.markdown(f"""
-                    <div class="conversion-result">
-                        <h4>💱 Conversion {index}</h4>
-                        <p><strong>{conversion_data['amount']} {conversion_data['from_currency']}</strong> = 
-                        <strong style="color: #2e7d32; font-size: 1.2em;">{conversion_data['converted_amount']} {conversion_data['to_currency']}</strong></p>
-                        <p>📊 Rate: 1 {conversion_data['from_currency']} = {conversion_data['exchange_rate']} {conversion_data['to_currency']}</p>
-                        <p>📅 Date: {conversion_data.get('date', 'N/A')}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                self._render_conversion_card(conversion_data, index)
             else:
                 # Fallback rendering
                 st.markdown(f"**Conversion {index}:**")
                 st.markdown(section)
-                
+
         except Exception as e:
             logger.error(f"Error rendering single conversion: {e}")
             st.markdown(f"**Conversion {index}:**")
             st.markdown(section)
+
+    def _render_conversion_card(self, conversion_data: Dict, index: int) -> None:
+        """
+        Render the styled HTML card for one parsed conversion
+        """
+        with st.container():
+            st.markdown(f"""
+            <div class="conversion-result">
+                <h4>💱 Conversion {index}</h4>
+                <p><strong>{conversion_data['amount']} {conversion_data['from_currency']}</strong> =
+                <strong style="color: #2e7d32; font-size: 1.2em;">{conversion_data['converted_amount']} {conversion_data['to_currency']}</strong></p>
+                <p>📊 Rate: 1 {conversion_data['from_currency']} = {conversion_data['exchange_rate']} {conversion_data['to_currency']}</p>
+                <p>📅 Date: {conversion_data.get('date', 'N/A')}</p>
+            </div>
+            """, unsafe_allow_html=True)
     
     def _parse_conversion_section(self, section: str) -> Optional[Dict]:
         """
         Parse conversion section to extract structured data
         """
         try:
-            # Regex patterns to extract conversion data
-            amount_pattern = r'(\d+(?:\.\d+)?)\s+([A-Z]{3})\s+=\s+\*\*(\d+(?:\.\d+)?)\s+([A-Z]{3})\*\*'
-            rate_pattern = r'1\s+([A-Z]{3})\s+=\s+(\d+(?:\.\d+)?)\s+([A-Z]{3})'
-            date_pattern = r'Rate Date:\s*(\d{4}-\d{2}-\d{2})'
-            
-            amount_match = re.search(amount_pattern, section)
-            rate_match = re.search(rate_pattern, section)
-            date_match = re.search(date_pattern, section)
-            
-            if amount_match:
-                return {
-                    'amount': amount_match.group(1),
-                    'from_currency': amount_match.group(2),
-                    'converted_amount': amount_match.group(3),
-                    'to_currency': amount_match.group(4),
-                    'exchange_rate': rate_match.group(2) if rate_match else 'N/A',
-                    'date': date_match.group(1) if date_match else 'N/A'
-                }
-            
-            return None
-            
+            fields = _parse_conversion_section_cached(section)
+            if fields is None:
+                return None
+
+            amount, from_currency, converted_amount, to_currency, rate, rate_date = fields
+            return {
+                'amount': amount,
+                'from_currency': from_currency,
+                'converted_amount': converted_amount,
+                'to_currency': to_currency,
+                'exchange_rate': rate,
+                'date': rate_date
+            }
+
         except Exception as e:
             logger.error(f"Error parsing conversion section: {e}")
             return None
@@ -152,12 +332,7 @@ class ChatInterface:
         """
         Check if content is a currency conversion response
         """
-        conversion_indicators = [
-            "💰", "💱", "📊", "Exchange Rate", "Conversion",
-            "=", "Rate Date", "[A-Z]{3}"
-        ]
-        
-        return any(indicator in content for indicator in conversion_indicators)
+        return _is_conversion_response_cached(content)
     
     def _render_timestamp(self, timestamp: str) -> None:
         """
@@ -211,19 +386,19 @@ class ChatInterface:
         """
         try:
             st.subheader("💰 Supported Currencies")
-            
-            # Create columns for better layout
+
+            # One markdown element per column instead of one st.write per
+            # currency: ~30 component nodes collapse to 3
             cols = st.columns(3)
-            
-            currency_items = list(currencies.items())
-            items_per_col = len(currency_items) // 3 + 1
-            
-            for i, (code, name) in enumerate(currency_items):
-                col_index = i // items_per_col
-                if col_index < 3:  # Safety check
-                    with cols[col_index]:
-                        st.write(f"**{code}** - {name}")
-                        
+            cols_html = ["", "", ""]
+
+            for i, (code, name) in enumerate(currencies.items()):
+                cols_html[i % 3] += f"<div><b>{code}</b> — {name}</div>"
+
+            for col, html in zip(cols, cols_html):
+                if html:
+                    col.markdown(html, unsafe_allow_html=True)
+
         except Exception as e:
             logger.error(f"Error rendering currency list: {e}")
             st.write("Error displaying currency list")
@@ -1,18 +1,30 @@
 import streamlit as st
-import asyncio
 import uuid
 from datetime import datetime
 from components.chat_interface import ChatInterface
 from components.api_client import APIClient
+from utils.async_loop import run_async, run_async_in_background
 from utils.session_manager import SessionManager
 import logging
 import requests
+from requests.adapters import HTTPAdapter
 import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sidebar example queries with labels and widget keys computed once at
+# import instead of hashing per rerun
+_EXAMPLE_QUERIES = tuple(
+    (query, f"📝 {query}", f"example_{i}")
+    for i, query in enumerate([
+        "Convert 100 USD to EUR",
+        "100 USD to EUR and 50 GBP to JPY",
+        "Convert 100 USD to EUR and 200 GBP to JPY"
+    ])
+)
+
 # Page configuration
 st.set_page_config(
     page_title="AI Currency Converter",
@@ -21,8 +33,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
+# Static UI fragments built once at import; Streamlit removes elements that
+# are not re-emitted on a rerun, so these must still be rendered each run —
+# but as shared constants, not per-rerun literals scattered through main()
+_CSS = """
 <style>
     .main-header {
         text-align: center;
@@ -32,14 +46,14 @@ st.markdown("""
         border-radius: 10px;
         margin-bottom: 2rem;
     }
-    
+
     .chat-container {
         background-color: #f8f9fa;
         border-radius: 10px;
         padding: 1rem;
         margin: 1rem 0;
     }
-    
+
     .conversion-result {
         background-color: #e3f2fd;
         border-left: 4px solid #2196f3;
@@ -47,7 +61,7 @@ st.markdown("""
         margin: 0.5rem 0;
         border-radius: 5px;
     }
-    
+
     .error-message {
         background-color: #ffebee;
         border-left: 4px solid #f44336;
@@ -56,7 +70,7 @@ st.markdown("""
         border-radius: 5px;
         color: #c62828;
     }
-    
+
     .sidebar-info {
         background-color: #f1f8e9;
         padding: 1rem;
@@ -64,33 +78,67 @@ st.markdown("""
         border-left: 4px solid #4caf50;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+_HEADER_HTML = """
+<div class="main-header">
+    <h1>🤖 AI Currency Converter</h1>
+    <p>Powered by OpenRouter & Frankfurter API</p>
+</div>
+"""
+
+_FOOTER_HTML = """
+<div style="text-align: center; color: #666;">
+    <p>Built with ❤️ using FastAPI, Streamlit, OpenRouter, and Frankfurter API</p>
+    <p>Real-time currency conversion with AI assistance</p>
+</div>
+"""
+
+st.markdown(_CSS, unsafe_allow_html=True)
+
+# Stateless service singletons live in Streamlit's process-wide resource
+# cache, so construction happens once per process rather than per session
+@st.cache_resource
+def get_api_client() -> APIClient:
+    return APIClient()
+
+@st.cache_resource
+def get_chat_interface() -> ChatInterface:
+    return ChatInterface()
+
+@st.cache_resource
+def get_session_manager() -> SessionManager:
+    return SessionManager()
+
+@st.cache_resource
+def get_health_session() -> requests.Session:
+    """Keep-alive session for health probes: one pooled connection to the
+    backend instead of a fresh TCP handshake per check. Cached as a
+    resource because main-script globals are rebuilt on every rerun."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    return session
 
 def initialize_session_state():
     """Initialize Streamlit session state variables"""
     if "session_id" not in st.session_state:
         st.session_state.session_id = str(uuid.uuid4())
-    
-    if "messages" not in st.session_state:
         st.session_state.messages = []
-    
-    if "api_client" not in st.session_state:
-        st.session_state.api_client = APIClient()
-    
-    if "chat_interface" not in st.session_state:
-        st.session_state.chat_interface = ChatInterface()
-    
-    if "session_manager" not in st.session_state:
-        st.session_state.session_manager = SessionManager()
+        # Cached singletons; only per-session data (id, messages) is state
+        st.session_state.api_client = get_api_client()
+        st.session_state.chat_interface = get_chat_interface()
+        st.session_state.session_manager = get_session_manager()
 
+@st.cache_data(ttl=10, show_spinner=False)
 def check_backend_health():
-    """Check backend health status with retries"""
+    """Check backend health status with retries (cached for 10s so each
+    widget interaction doesn't pay a blocking network round trip)"""
     MAX_RETRIES = 3
     RETRY_DELAY = 1  # seconds
     
     for attempt in range(MAX_RETRIES):
         try:
-            response = requests.get("http://localhost:8003/health", timeout=5)
+            response = get_health_session().get("http://localhost:8003/health", timeout=5)
             if response.status_code == 200:
                 return True
             logger.warning(f"Backend health check failed (attempt {attempt + 1}/{MAX_RETRIES})")
@@ -136,12 +184,7 @@ def main():
     display_connection_status()
     
     # Header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🤖 AI Currency Converter</h1>
-        <p>Powered by OpenRouter & Frankfurter API</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_HEADER_HTML, unsafe_allow_html=True)
     
     # Sidebar
     with st.sidebar:
@@ -167,14 +210,8 @@ def main():
         
         # Example queries
         st.subheader("💡 Example Queries")
-        example_queries = [
-            "Convert 100 USD to EUR",
-            "100 USD to EUR and 50 GBP to JPY",
-            "Convert 100 USD to EUR and 200 GBP to JPY"
-        ]
-        
-        for query in example_queries:
-            if st.button(f"📝 {query}", key=f"example_{hash(query)}"):
+        for query, label, key in _EXAMPLE_QUERIES:
+            if st.button(label, key=key):
                 st.session_state.example_query = query
         
         # Clear conversation
@@ -182,10 +219,6 @@ def main():
             if clear_conversation():
                 st.rerun()
     
-    # Main chat interface
-    # Display conversation history
-    st.session_state.chat_interface.display_messages(st.session_state.messages)
-    
     # Handle example query
     user_input = ""
     if "example_query" in st.session_state:
@@ -196,35 +229,33 @@ def main():
     prompt = st.chat_input("Ask me about currency conversion...") or user_input
     
     if prompt:
-        # Add user message to chat
+        # Append the new exchange before the history walk below so it
+        # renders exactly once this run, instead of a full history pass
+        # plus a second manual render of the same delta
+        now = datetime.now()
         st.session_state.messages.append({
             "role": "user",
             "content": prompt,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now.isoformat(),
+            "display_time": now.strftime("%H:%M:%S")
         })
         
-        # Display user message immediately
-        with st.chat_message("user"):
-            st.write(prompt)
-        
-        # Get AI response
-        with st.chat_message("assistant"):
-            with st.spinner("Converting currencies..."):
-                response = asyncio.run(get_ai_response(prompt))
-                st.write(response)
+        with st.spinner("Converting currencies..."):
+            response = run_async(get_ai_response(prompt))
         
-        # Add assistant message to chat
+        # Parse once here so reruns only re-template the precomputed model
+        now = datetime.now()
         st.session_state.messages.append({
-            "role": "assistant", 
+            "role": "assistant",
             "content": response,
-            "timestamp": datetime.now().isoformat()
+            "parsed": st.session_state.chat_interface.parse_response(response),
+            "timestamp": now.isoformat(),
+            "display_time": now.strftime("%H:%M:%S")
         })
     
-    # Display connection status
-    if st.session_state.api_client.is_connected():
-        st.success("✅ Connected to API")
-    else:
-        st.error("❌ API Connection Error")
+    # Main chat interface
+    # Display conversation history (including any exchange appended above)
+    st.session_state.chat_interface.display_messages(st.session_state.messages)
 
 async def get_ai_response(user_input: str) -> str:
     """Get response from AI assistant"""
@@ -262,9 +293,12 @@ def clear_conversation() -> bool:
         # Clear local session state
         st.session_state.messages = []
         
-        # Clear server-side conversation
+        # Clear server-side conversation in the background: local state is
+        # already gone, so the UI needn't wait on the HTTP round trip
         api_client = st.session_state.api_client
-        asyncio.run(api_client.clear_conversation(st.session_state.session_id))
+        run_async_in_background(
+            api_client.clear_conversation(st.session_state.session_id)
+        )
         
         # Reset session manager
         st.session_state.session_manager.clear_session(st.session_state.session_id)
@@ -279,12 +313,7 @@ def clear_conversation() -> bool:
 
 # Footer
 st.markdown("---")
-st.markdown("""
-<div style="text-align: center; color: #666;">
-    <p>Built with ❤️ using FastAPI, Streamlit, OpenRouter, and Frankfurter API</p>
-    <p>Real-time currency conversion with AI assistance</p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Shared asyncio event loop for the Streamlit frontend.
+
+Streamlit re-executes the main script on every rerun, so globals defined
+there are rebuilt per interaction. Imported modules survive reruns, which
+makes this the right home for the one long-lived loop: the cached API
+client's connection pool is bound to the loop it was created on, and
+driving it from a fresh loop each rerun raises "bound to a different
+event loop" errors.
+"""
+import asyncio
+import threading
+
+_LOOP = asyncio.new_event_loop()
+
+# Serializes loop access between the script thread and background threads
+_LOOP_LOCK = threading.Lock()
+
+
+def run_async(coro):
+    """Run a coroutine on the shared long-lived event loop"""
+    with _LOOP_LOCK:
+        return _LOOP.run_until_complete(coro)
+
+
+def run_async_in_background(coro) -> threading.Thread:
+    """
+    Run a coroutine on the shared loop from a daemon thread, for
+    fire-and-forget work the UI needn't wait on. The lock inside
+    run_async serializes it against the script thread, so both sides
+    drive the same loop (and the same client pool) one at a time.
+    """
+    thread = threading.Thread(target=run_async, args=(coro,), daemon=True)
+    thread.start()
+    return thread
@@ -1,290 +1,457 @@
 import streamlit as st
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
-import json
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+from datetime import datetime
+import heapq
 import logging
+import re
+import sys
+import time
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Indicators split by length: single characters (including the emoji, one
+# code point each) go through a C-level set-disjointness test that
+# short-circuits on the first hit; only the multi-character phrases need
+# the alternation regex
+_SINGLE_CHAR_INDICATORS = frozenset("💰💱📊=")
+_MULTI_INDICATOR_RE = re.compile("|".join(re.escape(s) for s in (
+    "Exchange Rate", "Conversion", "Rate Date"
+)))
+
+# deque(maxlen=...) evicts in O(1); a list sliced with [-50:] would copy on
+# every append past the cap
+_MAX_INTERACTIONS = 50
+
+# The server timezone is fixed for the process lifetime; resolving it per
+# session creation paid a datetime construction and astimezone conversion
+# each time
+try:
+    _SERVER_TZ = datetime.now().astimezone().tzinfo.tzname(None) or "UTC"
+except Exception:
+    _SERVER_TZ = "UTC"
+
+
+@dataclass(slots=True)
+class Interaction:
+    """One user/assistant exchange recorded against a session"""
+    timestamp: str
+    user_input: str
+    ai_response: str
+    input_length: int
+    response_length: int
+    contains_conversion: bool
+
+
+@dataclass(slots=True)
+class Session:
+    """
+    Per-session record. Slots turn field access into a C-level load and
+    drop the per-instance dict a plain dict-of-dicts layout would carry.
+    Timestamps are epoch floats; ISO strings are produced at read time.
+    """
+    id: str
+    created_at: float
+    last_activity: float
+    message_count: int = 0
+    conversion_count: int = 0
+    total_input_length: int = 0
+    total_response_length: int = 0
+    interactions: Deque[Interaction] = field(
+        default_factory=lambda: deque(maxlen=_MAX_INTERACTIONS)
+    )
+    user_agent: str = "Streamlit-App"
+    timezone: str = "UTC"
+
+
 class SessionManager:
+    # In Streamlit we don't have direct access to request headers, so the
+    # user agent is a generic identifier
+    _USER_AGENT = "Streamlit-App"
+
     def __init__(self):
         self.session_key = "currency_converter_sessions"
         self.max_sessions = 10
         self.session_timeout_hours = 24
-        
+        self.max_interactions = _MAX_INTERACTIONS
+        self._flush_threshold = 8
+
     def initialize_session_data(self) -> None:
         """
-        Initialize session data in Streamlit session state
+        Initialize session data in Streamlit session state. No instance
+        flag here: this object is a process-wide cache_resource singleton
+        while the state it guards is per-browser-session, so every call
+        must probe the current session's state.
         """
         if self.session_key not in st.session_state:
             st.session_state[self.session_key] = {}
-    
-    def create_session(self, session_id: str) -> Dict:
+
+    def _activity_heap(self) -> List[Tuple[float, str]]:
+        """
+        Min-heap of (last_activity, session_id) used for expiry; stale
+        entries are invalidated lazily when popped
+        """
+        heap_key = self.session_key + ":heap"
+        if heap_key not in st.session_state:
+            st.session_state[heap_key] = []
+        return st.session_state[heap_key]
+
+    def _pending_map(self) -> Dict[str, List[Interaction]]:
+        """
+        Staged interactions awaiting a batch commit, keyed by session ID.
+        Lives in st.session_state (not on this shared singleton) so each
+        browser session stages and flushes only its own sessions; read
+        paths call flush() first so they see a consistent view.
+        """
+        pending_key = self.session_key + ":pending"
+        if pending_key not in st.session_state:
+            st.session_state[pending_key] = defaultdict(list)
+        return st.session_state[pending_key]
+
+    def _touch(self, session: Session) -> float:
+        """
+        Record activity as an epoch float and index it for expiry
+        """
+        ts = time.time()
+        session.last_activity = ts
+        heapq.heappush(self._activity_heap(), (ts, session.id))
+        return ts
+
+    def create_session(self, session_id: str) -> Session:
         """
         Create a new session with metadata
         """
         self.initialize_session_data()
-        
-        session_data = {
-            "id": session_id,
-            "created_at": datetime.now().isoformat(),
-            "last_activity": datetime.now().isoformat(),
-            "message_count": 0,
-            "conversion_count": 0,
-            "interactions": [],
-            "metadata": {
-                "user_agent": self._get_user_agent(),
-                "timezone": self._get_timezone()
-            }
-        }
-        
-        st.session_state[self.session_key][session_id] = session_data
-        
+
+        # Interned IDs make the per-call dict and pending-buffer lookups
+        # pointer-equality hits instead of full string compares
+        session_id = sys.intern(session_id)
+        now = time.time()
+        session = Session(
+            id=session_id,
+            created_at=now,
+            last_activity=now,
+            user_agent=self._USER_AGENT,
+            timezone=_SERVER_TZ
+        )
+
+        st.session_state[self.session_key][session_id] = session
+        heapq.heappush(self._activity_heap(), (now, session_id))
+
         # Cleanup old sessions
         self._cleanup_old_sessions()
-        
-        logger.info(f"Created new session: {session_id}")
-        return session_data
-    
-    def get_session(self, session_id: str) -> Optional[Dict]:
+
+        logger.info("Created new session: %s", session_id)
+        return session
+
+    def get_session(self, session_id: str) -> Optional[Session]:
         """
         Get session data by ID
         """
         self.initialize_session_data()
-        
-        sessions = st.session_state[self.session_key]
-        if session_id in sessions:
-            session_data = sessions[session_id]
-            
-            # Update last activity
-            session_data["last_activity"] = datetime.now().isoformat()
-            sessions[session_id] = session_data
-            
-            return session_data
-        
-        return None
-    
+
+        session = st.session_state[self.session_key].get(session_id)
+        if session is not None:
+            self._touch(session)
+        return session
+
+    def _peek_session(self, session_id: str) -> Optional[Session]:
+        """
+        Look up a session without recording activity. Stats, export and
+        listing use this so reads don't stamp last_activity and re-push
+        heap entries.
+        """
+        return st.session_state[self.session_key].get(session_id)
+
     def add_interaction(self, session_id: str, user_input: str, ai_response: str) -> None:
         """
         Add interaction to session history
         """
         self.initialize_session_data()
-        
-        session_data = self.get_session(session_id)
-        if not session_data:
-            session_data = self.create_session(session_id)
-        
-        interaction = {
-            "timestamp": datetime.now().isoformat(),
-            "user_input": user_input,
-            "ai_response": ai_response,
-            "input_length": len(user_input),
-            "response_length": len(ai_response),
-            "contains_conversion": self._contains_conversion(ai_response)
-        }
-        
-        session_data["interactions"].append(interaction)
-        session_data["message_count"] += 1
-        session_data["last_activity"] = datetime.now().isoformat()
-        
-        if interaction["contains_conversion"]:
-            session_data["conversion_count"] += 1
-        
-        # Keep only last 50 interactions per session
-        if len(session_data["interactions"]) > 50:
-            session_data["interactions"] = session_data["interactions"][-50:]
-        
-        st.session_state[self.session_key][session_id] = session_data
-        
-        logger.debug(f"Added interaction to session {session_id}")
-    
+
+        session_id = sys.intern(session_id)
+        session = self.get_session(session_id)
+        if not session:
+            session = self.create_session(session_id)
+
+        interaction = Interaction(
+            timestamp=datetime.now().isoformat(),
+            user_input=user_input,
+            ai_response=ai_response,
+            input_length=len(user_input),
+            response_length=len(ai_response),
+            contains_conversion=self._contains_conversion(ai_response)
+        )
+
+        # Stage the interaction; the batch is committed once the threshold
+        # is hit (or earlier by a read path calling flush)
+        pending = self._pending_map()[session_id]
+        pending.append(interaction)
+        if len(pending) >= self._flush_threshold:
+            self._flush_pending(session, pending)
+
+        logger.debug("Added interaction to session %s", session_id)
+
+    def flush(self, session_id: str) -> None:
+        """
+        Commit any staged interactions for a session to session state
+        """
+        pending_map = self._pending_map()
+        pending = pending_map.get(session_id)
+        if not pending:
+            return
+        session = st.session_state[self.session_key].get(session_id)
+        if session is not None:
+            self._flush_pending(session, pending)
+        else:
+            # The session was cleared or evicted; its staged entries go too
+            pending_map.pop(session_id, None)
+
+    def _flush_pending(self, session: Session, pending: List[Interaction]) -> None:
+        """
+        Apply a batch of staged interactions: deque appends, eviction
+        adjustments and counter updates in one pass
+        """
+        interactions = session.interactions
+
+        for interaction in pending:
+            # Running sums keep stats O(1); adjust for the interaction the
+            # full deque is about to evict
+            if len(interactions) == interactions.maxlen:
+                evicted = interactions[0]
+                session.total_input_length -= evicted.input_length
+                session.total_response_length -= evicted.response_length
+
+            interactions.append(interaction)
+            session.total_input_length += interaction.input_length
+            session.total_response_length += interaction.response_length
+            if interaction.contains_conversion:
+                session.conversion_count += 1
+
+        session.message_count += len(pending)
+        pending.clear()
+
+        # No writeback needed: the Session object mutated above is the same
+        # one held in session_state
+
     def clear_session(self, session_id: str) -> bool:
         """
         Clear session data
         """
         self.initialize_session_data()
-        
+
         sessions = st.session_state[self.session_key]
+        self._pending_map().pop(session_id, None)
         if session_id in sessions:
             del sessions[session_id]
-            logger.info(f"Cleared session: {session_id}")
+            logger.info("Cleared session: %s", session_id)
             return True
-        
+
         return False
-    
+
     def get_session_stats(self, session_id: str) -> Dict:
         """
         Get session statistics
         """
-        session_data = self.get_session(session_id)
-        if not session_data:
+        self.initialize_session_data()
+        self.flush(session_id)
+        session = self._peek_session(session_id)
+        if not session:
             return {"exists": False}
-        
-        interactions = session_data.get("interactions", [])
-        
-        stats = {
+
+        # One length lookup, one dict literal: no post-hoc mutation pass
+        count = len(session.interactions)
+        return {
             "exists": True,
             "session_id": session_id,
-            "created_at": session_data.get("created_at"),
-            "last_activity": session_data.get("last_activity"),
-            "total_messages": session_data.get("message_count", 0),
-            "conversion_count": session_data.get("conversion_count", 0),
-            "total_interactions": len(interactions),
-            "average_input_length": 0,
-            "average_response_length": 0,
-            "session_duration": self._calculate_session_duration(session_data)
+            "created_at": datetime.fromtimestamp(session.created_at).isoformat(),
+            "last_activity": datetime.fromtimestamp(session.last_activity).isoformat(),
+            "total_messages": session.message_count,
+            "conversion_count": session.conversion_count,
+            "total_interactions": count,
+            "average_input_length": session.total_input_length / count if count else 0,
+            "average_response_length": session.total_response_length / count if count else 0,
+            "session_duration": self._calculate_session_duration(session)
         }
-        
-        if interactions:
-            stats["average_input_length"] = sum(i.get("input_length", 0) for i in interactions) / len(interactions)
-            stats["average_response_length"] = sum(i.get("response_length", 0) for i in interactions) / len(interactions)
-        
-        return stats
-    
+
     def get_all_sessions(self) -> List[Dict]:
         """
         Get all session data (summary)
         """
         self.initialize_session_data()
-        
+
         sessions = st.session_state[self.session_key]
-        session_list = []
-        
-        for session_id, session_data in sessions.items():
-            session_summary = {
-                "id": session_id,
-                "created_at": session_data.get("created_at"),
-                "last_activity": session_data.get("last_activity"),
-                "message_count": session_data.get("message_count", 0),
-                "conversion_count": session_data.get("conversion_count", 0)
+        for session_id in list(self._pending_map()):
+            self.flush(session_id)
+
+        # Sort the Session objects on the float timestamp, then build the
+        # summaries in one comprehension
+        return [
+            {
+                "id": s.id,
+                "created_at": datetime.fromtimestamp(s.created_at).isoformat(),
+                "last_activity": datetime.fromtimestamp(s.last_activity).isoformat(),
+                "message_count": s.message_count,
+                "conversion_count": s.conversion_count
             }
-            session_list.append(session_summary)
-        
-        # Sort by last activity
-        session_list.sort(key=lambda x: x["last_activity"], reverse=True)
-        
-        return session_list
-    
+            for s in sorted(sessions.values(), key=lambda s: s.last_activity, reverse=True)
+        ]
+
     def export_session_data(self, session_id: str) -> Optional[str]:
         """
         Export session data as JSON string
         """
-        session_data = self.get_session(session_id)
-        if not session_data:
+        self.initialize_session_data()
+        self.flush(session_id)
+        session = self._peek_session(session_id)
+        if not session:
             return None
-        
+
         try:
-            return json.dumps(session_data, indent=2, default=str)
+            # orjson serializes dataclasses natively; default=list only
+            # materializes the interactions deque
+            return orjson.dumps(session, option=orjson.OPT_INDENT_2, default=list).decode()
         except Exception as e:
-            logger.error(f"Error exporting session data: {e}")
+            logger.error("Error exporting session data: %s", e)
             return None
-    
+
     def import_session_data(self, session_data_json: str) -> Optional[str]:
         """
         Import session data from JSON string
         """
         try:
-            session_data = json.loads(session_data_json)
-            session_id = session_data.get("id")
-            
+            data = orjson.loads(session_data_json)
+            session_id = data.get("id")
+
             if not session_id:
                 return None
-            
+            session_id = sys.intern(session_id)
+
+            interactions = deque(
+                (
+                    Interaction(
+                        timestamp=i.get("timestamp", ""),
+                        user_input=i.get("user_input", ""),
+                        ai_response=i.get("ai_response", ""),
+                        input_length=i.get("input_length", len(i.get("user_input", ""))),
+                        response_length=i.get("response_length", len(i.get("ai_response", ""))),
+                        contains_conversion=i.get("contains_conversion", False)
+                    )
+                    for i in data.get("interactions", [])
+                ),
+                maxlen=self.max_interactions
+            )
+
+            # Older exports carried ISO strings and a nested metadata dict
+            metadata = data.get("metadata", {})
+            session = Session(
+                id=session_id,
+                created_at=self._as_epoch(data.get("created_at")),
+                last_activity=self._as_epoch(data.get("last_activity")),
+                message_count=data.get("message_count", 0),
+                conversion_count=data.get("conversion_count", 0),
+                total_input_length=data.get(
+                    "total_input_length",
+                    sum(i.input_length for i in interactions)
+                ),
+                total_response_length=data.get(
+                    "total_response_length",
+                    sum(i.response_length for i in interactions)
+                ),
+                interactions=interactions,
+                user_agent=data.get("user_agent", metadata.get("user_agent", "Streamlit-App")),
+                timezone=data.get("timezone", metadata.get("timezone", "UTC"))
+            )
+
             self.initialize_session_data()
-            st.session_state[self.session_key][session_id] = session_data
-            
-            logger.info(f"Imported session data for: {session_id}")
+            # Staged interactions belong to the session being replaced
+            self._pending_map().pop(session_id, None)
+            st.session_state[self.session_key][session_id] = session
+            # Importing counts as activity and seeds the expiry index
+            self._touch(session)
+
+            logger.info("Imported session data for: %s", session_id)
             return session_id
-            
+
         except Exception as e:
-            logger.error(f"Error importing session data: {e}")
+            logger.error("Error importing session data: %s", e)
             return None
-    
+
+    @staticmethod
+    def _as_epoch(value) -> float:
+        """
+        Normalize a timestamp that may be an epoch float or an ISO string
+        """
+        if isinstance(value, str):
+            return datetime.fromisoformat(value).timestamp()
+        return float(value) if value is not None else time.time()
+
     def _cleanup_old_sessions(self) -> None:
         """
         Clean up old or excess sessions
         """
         try:
             sessions = st.session_state[self.session_key]
-            
-            # Remove sessions older than timeout
-            cutoff_time = datetime.now() - timedelta(hours=self.session_timeout_hours)
-            expired_sessions = []
-            
-            for session_id, session_data in sessions.items():
-                last_activity = datetime.fromisoformat(session_data.get("last_activity", "1970-01-01"))
-                if last_activity < cutoff_time:
-                    expired_sessions.append(session_id)
-            
-            for session_id in expired_sessions:
-                del sessions[session_id]
-                logger.info(f"Removed expired session: {session_id}")
-            
+            heap = self._activity_heap()
+
+            # Expire from the heap root: float comparisons, no ISO parsing.
+            # Entries whose timestamp no longer matches the session are
+            # stale re-pushes (or cleared sessions) and are simply dropped.
+            cutoff_ts = time.time() - self.session_timeout_hours * 3600
+            while heap and heap[0][0] < cutoff_ts:
+                ts, session_id = heapq.heappop(heap)
+                session = sessions.get(session_id)
+                if session is not None and session.last_activity == ts:
+                    del sessions[session_id]
+                    logger.info("Removed expired session: %s", session_id)
+
             # Remove excess sessions (keep most recent)
             if len(sessions) > self.max_sessions:
-                session_items = list(sessions.items())
-                session_items.sort(key=lambda x: x[1].get("last_activity", "1970-01-01"))
-                
+                session_items = sorted(
+                    sessions.items(),
+                    key=lambda x: x[1].last_activity
+                )
+
                 excess_count = len(sessions) - self.max_sessions
-                for i in range(excess_count):
-                    session_id = session_items[i][0]
+                for session_id, _ in session_items[:excess_count]:
                     del sessions[session_id]
-                    logger.info(f"Removed excess session: {session_id}")
-            
+                    logger.info("Removed excess session: %s", session_id)
+
         except Exception as e:
-            logger.error(f"Error during session cleanup: {e}")
-    
+            logger.error("Error during session cleanup: %s", e)
+
     def _contains_conversion(self, text: str) -> bool:
         """
         Check if text contains currency conversion results
         """
-        conversion_indicators = [
-            "💰", "💱", "📊", "Exchange Rate", "Conversion",
-            "=", "Rate Date"
-        ]
-        
-        return any(indicator in text for indicator in conversion_indicators)
-    
-    def _calculate_session_duration(self, session_data: Dict) -> str:
+        if not _SINGLE_CHAR_INDICATORS.isdisjoint(text):
+            return True
+        return _MULTI_INDICATOR_RE.search(text) is not None
+
+    def _calculate_session_duration(self, session: Session) -> str:
         """
         Calculate session duration
         """
         try:
-            created_at = datetime.fromisoformat(session_data.get("created_at", ""))
-            last_activity = datetime.fromisoformat(session_data.get("last_activity", ""))
-            
-            duration = last_activity - created_at
-            
-            if duration.days > 0:
-                return f"{duration.days} days, {duration.seconds // 3600} hours"
-            elif duration.seconds >= 3600:
-                return f"{duration.seconds // 3600} hours, {(duration.seconds % 3600) // 60} minutes"
-            elif duration.seconds >= 60:
-                return f"{duration.seconds // 60} minutes"
+            # Epoch floats subtract directly; divmod peels off each unit in
+            # one pass instead of a timedelta plus repeated // and %
+            days, rem = divmod(int(session.last_activity - session.created_at), 86400)
+            hours, rem = divmod(rem, 3600)
+            minutes, seconds = divmod(rem, 60)
+
+            if days > 0:
+                return f"{days} days, {hours} hours"
+            elif hours > 0:
+                return f"{hours} hours, {minutes} minutes"
+            elif minutes > 0:
+                return f"{minutes} minutes"
             else:
-                return f"{duration.seconds} seconds"
-                
+                return f"{seconds} seconds"
+
         except Exception as e:
-            logger.error(f"Error calculating session duration: {e}")
+            logger.error("Error calculating session duration: %s", e)
             return "Unknown"
-    
-    def _get_user_agent(self) -> str:
-        """
-        Get user agent (simplified for Streamlit)
-        """
-        try:
-            # In Streamlit, we don't have direct access to request headers
-            # Return a generic identifier
-            return "Streamlit-App"
-        except:
-            return "Unknown"
-    
-    def _get_timezone(self) -> str:
-        """
-        Get user timezone (simplified)
-        """
-        try:
-            # Return server timezone as we can't easily get client timezone in Streamlit
-            return datetime.now().astimezone().tzinfo.tzname(None) or "UTC"
-        except:
-            return "UTC"
\ No newline at end of file
+